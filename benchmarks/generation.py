@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Benchmarks for the dataset generation pipeline, CPU only and no network. A synthetic uint8 image environment is used as a stand-in for atari, 
+   the MNIST environment requires the MNIST data to have been downloaded (by torchvision) beforehand, MNIST benchmarks are skipped otherwise.
+
+   Usage:
+      python benchmarks/generation.py --output results.json
+      python benchmarks/generation.py --output results.json --baseline baseline.json --tolerance 0.1
+
+   Results are saved as JSON (transitions/sec and MB/sec for each benchmark), if a baseline is given each benchmark is compared against it and 
+   the exit code is 1 if any benchmark is slower than the baseline by more than the tolerance.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import sys
+import json
+import time
+import pathlib
+import platform
+import argparse
+import tempfile
+import numpy as np
+import gym
+import gymu
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent)) # run from a checkout without installing
+
+from thesisdata.utils import GymDatasetWriter, ObservationView, EpisodeBuffer
+from thesisdata.utils._profile import file_size
+
+EPISODE_LENGTHS = (64, 512, 4096)
+
+class SyntheticImageEnvironment(gym.Env):
+    """ Atari-like stand-in, uint8 HWC (210,160,3) observations sampled from a fixed bank of random frames. """
+
+    def __init__(self, num_actions=6, max_episode_length=1000, shape=(210,160,3), bank_size=64):
+        super().__init__()
+        self.action_space = gym.spaces.Discrete(num_actions)
+        self.observation_space = gym.spaces.Box(0, 255, shape=shape, dtype=np.uint8)
+        self.max_episode_length = max_episode_length
+        self._frames = np.random.default_rng(0).integers(0, 256, size=(bank_size, *shape), dtype=np.uint8)
+        self._step = 0
+
+    def step(self, action):
+        self._step += 1
+        state = self._frames[(self._step * (action + 1)) % self._frames.shape[0]].copy()
+        return state, 0., self._step >= self.max_episode_length, dict()
+
+    def reset(self):
+        self._step = 0
+        return self._frames[0].copy()
+
+def make_synthetic(max_episode_length):
+    return SyntheticImageEnvironment(max_episode_length=max_episode_length)
+
+def check_mnist(train=True):
+    """ Raise if the MNIST data (the grouped cache or the torchvision files) is not available locally, benchmarks never download it. """
+    from thesisdata.environment.mnist import MNIST_PATH, MNISTGroupedData
+    if all(pathlib.Path(MNISTGroupedData.path(train), f"{f}.npy").exists() for f in MNISTGroupedData.FIELDS):
+        return
+    prefix = "train" if train else "t10k"
+    files = [pathlib.Path(MNIST_PATH, "MNIST", "raw", f"{prefix}-{name}-ubyte") for name in ("images-idx3", "labels-idx1")]
+    if not all(f.exists() for f in files):
+        raise FileNotFoundError(f"MNIST data not found in {MNIST_PATH}")
+
+def make_mnist(max_episode_length):
+    check_mnist()
+    from thesisdata.environment.mnist import MNISTEnvironment
+    return MNISTEnvironment(num_actions=4, max_episode_length=max_episode_length)
+
+ENVIRONMENTS = dict(synthetic=make_synthetic, mnist=make_mnist)
+
+def timed(fun, repeat=3):
+    """ Best of repeat, returns (time, result). """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fun()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def result(transitions, elapsed, size=None):
+    result = dict(transitions=transitions, time=elapsed, transitions_per_sec=transitions / elapsed)
+    if size is not None:
+        result.update(bytes=size, mb_per_sec=size / elapsed / 1e6)
+    return result
+
+def bench_step(make_env, n=4096):
+    env = make_env(n + 1)
+    env.reset()
+    actions = np.random.default_rng(0).integers(0, env.action_space.n, size=n)
+    def _step():
+        for a in actions:
+            env.step(a)
+        env.reset()
+    elapsed, _ = timed(_step)
+    return result(n, elapsed, size=n * env.observation_space.sample().nbytes)
+
+def bench_reset(make_env, n=1024):
+    env = make_env(1)
+    def _reset():
+        for _ in range(n):
+            env.reset()
+    elapsed, _ = timed(_reset)
+    return result(n, elapsed)
+
+def bench_conversion(n=1024):
+    # per-step write wrappers vs chunked write time conversion (see EpisodeBuffer) vs a single read time conversion (see ObservationView), n transitions.
+    env = make_synthetic(n)
+    frames = np.stack([env.observation_space.sample() for _ in range(n + 1)])
+    observations = list(frames) # as in an episode, nextstate[t] and state[t+1] are the same object
+    wrapped = gymu.wrappers.image.CHW(gymu.wrappers.image.Float(env))
+    float_wrapper = wrapped.env
+    def _per_step(): # state and nextstate are converted separately
+        for i in range(n):
+            wrapped.observation(float_wrapper.observation(observations[i]))
+            wrapped.observation(float_wrapper.observation(observations[i+1]))
+    def _buffered():
+        buffer = EpisodeBuffer(float=True, chw=True)
+        for i in range(n):
+            buffer.append(dict(state=observations[i], nextstate=observations[i+1]))
+            if buffer.full:
+                buffer.flush()
+        buffer.flush()
+    view = ObservationView(float=True, chw=True)
+    def _batch():
+        view(dict(state=frames))
+    results = dict()
+    for name, fun in [("per_step", _per_step), ("buffered", _buffered), ("batch", _batch)]:
+        elapsed, _ = timed(fun)
+        results[name] = result(n, elapsed, size=frames.nbytes)
+    return results
+
+def bench_vector_step(num_envs=64, n=256):
+    # MNISTEnvironment stepped one at a time vs MNISTVectorEnvironment
+    check_mnist()
+    from thesisdata.environment.mnist import MNISTEnvironment, MNISTVectorEnvironment
+    env = MNISTEnvironment(num_actions=4)
+    venv = MNISTVectorEnvironment(num_envs=num_envs, num_actions=4)
+    actions = np.random.randint(0, 4, size=(n, num_envs))
+    def _single():
+        env.reset()
+        for a in actions.reshape(-1):
+            env.step(int(a))
+    def _vector():
+        venv.reset()
+        for a in actions:
+            venv.step(a)
+    results = dict()
+    for name, fun in [("single", _single), ("vector", _vector)]:
+        elapsed, _ = timed(fun)
+        results[name] = result(actions.size, elapsed)
+    return results
+
+def bench_sample_episode(n=4096):
+    # a uniform policy episode stepped one at a time vs sampled in one pass (see MNISTEnvironment.sample_episode)
+    env = make_mnist(n)
+    policy = gymu.policy.Uniform(env)
+    def _step():
+        state, _ = env.reset()
+        for _ in range(n):
+            state, *_ = env.step(policy(state))
+    def _sample():
+        env.sample_episode()
+    results = dict()
+    for name, fun in [("step", _step), ("sample", _sample)]:
+        elapsed, _ = timed(fun)
+        results[name] = result(n, elapsed)
+    return results
+
+def bench_write(make_env, length, storage=None, raw_observations=False, num_episodes=2):
+    env = make_env(length)
+    policy = gymu.policy.Uniform(env)
+    def _write():
+        with tempfile.TemporaryDirectory() as path:
+            iterator = gymu.iter.Iterator(env, policy=policy, mode=gymu.mode.mode("sardi"), max_length=length)
+            writer = GymDatasetWriter(pathlib.Path(path, "data"), iterator, write_mode='w', seed=0, storage=storage, raw_observations=raw_observations)
+            writer.write(num_episodes)
+            writer.close()
+            transitions = sum(e['length'] for e in writer.manifest.episodes.values())
+            return transitions, file_size(pathlib.Path(path, "data"))
+    elapsed, (transitions, size) = timed(_write, repeat=1 if length > 1000 else 3)
+    return result(transitions, elapsed, size=size)
+
+def run(names=None):
+    benchmarks = dict()
+    for env_name, make_env in ENVIRONMENTS.items():
+        benchmarks[f"{env_name}/step"] = lambda make_env=make_env: bench_step(make_env)
+        benchmarks[f"{env_name}/reset"] = lambda make_env=make_env: bench_reset(make_env)
+        for length in EPISODE_LENGTHS:
+            benchmarks[f"{env_name}/write/gymu/{length}"] = lambda make_env=make_env, length=length: bench_write(make_env, length)
+            benchmarks[f"{env_name}/write/npy/{length}"] = lambda make_env=make_env, length=length: bench_write(make_env, length, storage="npy")
+        benchmarks[f"{env_name}/write/npy-raw/{EPISODE_LENGTHS[1]}"] = lambda make_env=make_env: bench_write(make_env, EPISODE_LENGTHS[1], storage="npy", raw_observations=True)
+    benchmarks["conversion"] = bench_conversion
+    benchmarks["mnist/vector"] = bench_vector_step
+    benchmarks["mnist/episode"] = bench_sample_episode
+
+    results, skipped = dict(), dict()
+    for name, bench in benchmarks.items():
+        if names is not None and not any(name.startswith(n) for n in names):
+            continue
+        try:
+            value = bench()
+        except Exception as e: # e.g. MNIST data is missing (see check_mnist)
+            skipped[name] = f"{type(e).__name__}: {e}"
+            print(f"{name:<40} SKIPPED ({skipped[name]})")
+            continue
+        for k, v in (value.items() if "transitions" not in value else [(None, value)]):
+            key = name if k is None else f"{name}/{k}"
+            results[key] = v
+            mb = f"{v['mb_per_sec']:10.1f} MB/s" if 'mb_per_sec' in v else ""
+            print(f"{key:<40} {v['transitions_per_sec']:12.1f} transitions/s {mb}")
+    return results, skipped
+
+def compare(results, baseline, tolerance):
+    """ Compare results against a baseline, returns the names of benchmarks that are slower than the baseline by more than tolerance. """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        ratio = value['transitions_per_sec'] / baseline[name]['transitions_per_sec']
+        status = "REGRESSION" if ratio < 1 - tolerance else ""
+        if status:
+            regressions.append(name)
+        print(f"{name:<40} {ratio:8.2f}x baseline {status}")
+    return regressions
+
+def environment_info():
+    info = dict(python=platform.python_version(), platform=platform.platform(), processor=platform.processor(), numpy=np.__version__, gym=gym.__version__)
+    try:
+        import torch
+        info['torch'] = torch.__version__
+    except ImportError:
+        pass
+    return info
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="thesis-data-benchmark", description="Benchmark the dataset generation pipeline.")
+    parser.add_argument("--output", "-o", type=str, default=None, help="File to save results to (JSON).")
+    parser.add_argument("--baseline", "-b", type=str, default=None, help="Results (JSON) to compare against.")
+    parser.add_argument("--tolerance", "-t", type=float, default=0.1, help="Allowed slow down relative to the baseline before a benchmark is considered a regression.")
+    parser.add_argument("--only", nargs="*", default=None, help="Only run benchmarks whose name starts with one of these e.g. 'synthetic/write'.")
+    args = parser.parse_args()
+
+    results, skipped = run(args.only)
+    output = dict(environment=environment_info(), time=time.strftime("%Y-%m-%dT%H:%M:%S"), results=results, skipped=skipped)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Import time benchmarks, each import is timed in a fresh interpreter (this is what a DataLoader worker or a short CLI call pays at startup).
+
+   Usage:
+      python benchmarks/imports.py --output results.json
+      python benchmarks/imports.py --output results.json --baseline baseline.json --tolerance 0.2
+
+   Results are saved as JSON (seconds for each import and the modules it pulled in), if a baseline is given each import is compared against it and 
+   the exit code is 1 if any import is slower than the baseline by more than the tolerance.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import os
+import sys
+import json
+import time
+import pathlib
+import platform
+import argparse
+import subprocess
+
+ROOT = pathlib.Path(__file__).parent.parent # run from a checkout without installing
+HEAVY = ("torch", "torchvision", "cv2", "gym", "gymu", "omegaconf", "stable_baselines3")
+
+IMPORTS = {
+    "thesisdata": "import thesisdata",
+    "thesisdata.utils": "import thesisdata.utils",
+    "thesisdata.utils.DatasetReader": "from thesisdata.utils import DatasetReader",
+    "thesisdata.utils.GymDatasetWriter": "from thesisdata.utils import GymDatasetWriter",
+    "thesisdata.transform": "import thesisdata.transform",
+}
+
+_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps(dict(time=elapsed, heavy=[m for m in {heavy} if m in sys.modules])))
+"""
+
+def bench_import(statement, repeat=5):
+    """ Best of repeat, each in a new interpreter. """
+    best, heavy = float("inf"), None
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), os.environ.get("PYTHONPATH", "")]))
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _SCRIPT.format(statement=statement, heavy=HEAVY)], capture_output=True, text=True, env=env, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        best, heavy = min(best, result['time']), result['heavy']
+    return dict(time=best, heavy=heavy)
+
+def bench_cli(repeat=3):
+    """ python -m thesisdata --help, the CLI parses its arguments before importing gym, gymu, ... """
+    best = float("inf")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), os.environ.get("PYTHONPATH", "")]))
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "thesisdata", "--help"], capture_output=True, env=env, check=True)
+        best = min(best, time.perf_counter() - start)
+    return dict(time=best)
+
+def run(only=None):
+    results, skipped = dict(), dict()
+    benchmarks = {name:(lambda s=statement: bench_import(s)) for name, statement in IMPORTS.items()}
+    benchmarks["cli/help"] = bench_cli
+    for name, fun in benchmarks.items():
+        if only is not None and not any(name.startswith(o) for o in only):
+            continue
+        try:
+            results[name] = fun()
+        except subprocess.CalledProcessError as e: # e.g. torch is not installed
+            skipped[name] = (e.stderr or "").strip().splitlines()[-1:]
+            print(f"{name:<40} skipped")
+            continue
+        heavy = ", ".join(results[name].get('heavy', []))
+        print(f"{name:<40} {results[name]['time']:8.3f} s  {heavy}")
+    return results, skipped
+
+def compare(results, baseline, tolerance):
+    """ Compare results against a baseline, returns the names of imports that are slower than the baseline by more than tolerance. """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        ratio = value['time'] / baseline[name]['time']
+        status = "REGRESSION" if ratio > 1 + tolerance else ""
+        if status:
+            regressions.append(name)
+        print(f"{name:<40} {ratio:8.2f}x baseline time {status}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="thesis-data-import-benchmark", description="Benchmark import time.")
+    parser.add_argument("--output", "-o", type=str, default=None, help="File to save results to (JSON).")
+    parser.add_argument("--baseline", "-b", type=str, default=None, help="Results (JSON) to compare against.")
+    parser.add_argument("--tolerance", "-t", type=float, default=0.2, help="Allowed slow down relative to the baseline before an import is considered a regression.")
+    parser.add_argument("--only", nargs="*", default=None, help="Only run benchmarks whose name starts with one of these e.g. 'thesisdata.utils'.")
+    args = parser.parse_args()
+
+    results, skipped = run(args.only)
+    output = dict(environment=dict(python=platform.python_version(), platform=platform.platform()), time=time.strftime("%Y-%m-%dT%H:%M:%S"), results=results, skipped=skipped)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,6 @@
+# Benchmark the generation pipeline (CPU only), compare against a previous run with --baseline
+python benchmarks/generation.py --output bench_results.json
+#python benchmarks/generation.py --output bench_results.json --baseline bench_baseline.json
+
+# Import time (fresh interpreter for each import)
+python benchmarks/imports.py --output import_results.json
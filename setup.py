@@ -22,6 +22,9 @@ setup(name='thesisdata',
             #'gymu @ git+https://git@github.com/BenedictWilkins/gymu.git',
             #'stable_baselines3 @ git+https://github.com/DLR-RM/stable-baselines3.git#009bb0549ad0c9c1130309d95529a237e126578c'
         ],
+        extras_require={
+            'codecs': ['lz4', 'zstandard'], # --codec lz4/zstd
+        },
         entry_points={
             "gym.envs": [
                 "thesis = thesisdata.environment:register_entry_point"
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   Tests for the global transition index.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+import pytest
+
+from thesisdata.utils._manifest import Manifest
+from thesisdata.utils._index import TransitionIndex, write_transition_index
+
+def _index(lengths):
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return TransitionIndex([str(i).zfill(8) for i in range(len(lengths))], lengths, offsets)
+
+def test_lookup_zero_length_episodes():
+    lengths = [0, 3, 0, 0, 2, 0]
+    index = _index(lengths)
+    assert len(index) == 5
+    expected = [(e, o) for e, n in enumerate(lengths) for o in range(n)]
+    assert [index.lookup(i) for i in range(len(index))] == expected
+    episodes, offsets = index.lookup(np.arange(len(index)))
+    assert list(zip(episodes.tolist(), offsets.tolist())) == expected
+    assert index.lookup(-1) == (4, 1)
+    assert index[3] == ("00000004", 0)
+    with pytest.raises(IndexError):
+        index.lookup(5)
+    with pytest.raises(IndexError):
+        _index([0, 0]).lookup(0)
+
+def test_write_transition_index_includes_other_writers(tmp_path):
+    manifest, other = Manifest(tmp_path), Manifest(tmp_path)
+    manifest.commit("00000000", files=[], length=2)
+    other.commit("00000001", files=[], length=0)
+    other.commit("00000002", files=[], length=4)
+    write_transition_index(tmp_path, manifest) # the manifest of this writer is stale
+    index = TransitionIndex.load(tmp_path)
+    assert list(index.episodes) == ["00000000", "00000001", "00000002"]
+    assert len(index) == 6
+    assert index[2] == ("00000002", 0)
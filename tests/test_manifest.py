@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   Tests for the manifest: atomic commits, resuming after a crash, cleaning up temporary files and reserving episode numbers from several processes.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import pathlib
+import multiprocessing
+import numpy as np
+
+from thesisdata.utils._manifest import Manifest, TMP_DIRECTORY
+from thesisdata.utils._storage import NpyStorage
+from thesisdata.utils._utils import commit_files
+
+def _write(manifest, name, length=3):
+    # write an episode to the temporary directory and move it into place, without adding it to the manifest
+    manifest.tmp.mkdir(parents=True, exist_ok=True)
+    files = NpyStorage().write(manifest.tmp, name, [dict(state=np.full(2, t), action=np.int64(t)) for t in range(length)])
+    return commit_files(files, manifest.path)
+
+def test_commit(tmp_path):
+    manifest = Manifest(tmp_path)
+    manifest.commit("00000000", files=_write(manifest, "00000000"), length=3, seed=0)
+    reloaded = Manifest(tmp_path)
+    assert "00000000" in reloaded
+    assert reloaded.episodes["00000000"] == dict(files=["00000000"], length=3, seed=0)
+
+def test_resume_after_crash(tmp_path):
+    manifest = Manifest(tmp_path)
+    manifest.commit("00000000", files=_write(manifest, "00000000"), length=3)
+    _write(manifest, "00000001") # moved into place, crashed before the manifest was updated
+    manifest.tmp.mkdir(parents=True, exist_ok=True)
+    pathlib.Path(manifest.tmp, "00000002").mkdir() # unfinished episode
+
+    resumed = Manifest(tmp_path)
+    resumed.clean()
+    assert not pathlib.Path(tmp_path, "00000001").exists()
+    assert not pathlib.Path(tmp_path, TMP_DIRECTORY).exists()
+    assert pathlib.Path(tmp_path, "00000000").exists()
+    assert resumed.missing(3) == [1, 2]
+
+    for episode in resumed.missing(3): # the uncommitted episode can be written again
+        name = str(episode).zfill(8)
+        resumed.commit(name, files=_write(resumed, name), length=3)
+    assert sorted(Manifest(tmp_path).episodes.keys()) == ["00000000", "00000001", "00000002"]
+
+def test_release(tmp_path):
+    manifest, other = Manifest(tmp_path), Manifest(tmp_path)
+    manifest.tmp.mkdir(parents=True)
+    other.tmp.mkdir(parents=True)
+    manifest.release()
+    assert not manifest.tmp.exists() and other.tmp.exists()
+    other.release()
+    assert not pathlib.Path(tmp_path, TMP_DIRECTORY).exists()
+
+def _reserve(path, n, repeat, results):
+    manifest = Manifest(path)
+    results.put([e for _ in range(repeat) for e in manifest.reserve(n)])
+
+def test_reserve_two_processes(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=_reserve, args=(tmp_path, 3, 20, results)) for _ in range(2)]
+    for p in processes:
+        p.start()
+    reserved = [results.get(timeout=60) for _ in processes]
+    for p in processes:
+        p.join()
+    assert len(set(reserved[0]) & set(reserved[1])) == 0
+    assert sorted(reserved[0] + reserved[1]) == list(range(2 * 3 * 20))
+    assert Manifest(tmp_path).next_episode() == 2 * 3 * 20
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   Tests for the storage backends: state/nextstate deduplication round trips for 'columns' and 'npy' storage.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import pathlib
+import numpy as np
+import pytest
+
+from thesisdata.utils._storage import ColumnStorage, NpyStorage, read_columns, OBSERVATION
+from thesisdata.utils._reader import Episode
+
+def _episode(length=7, shared=True):
+    observation = np.random.default_rng(0).integers(0, 255, size=(length + 1, 4, 3), dtype=np.uint8)
+    nextstate = observation[1:] if shared else observation[1:][::-1]
+    return [dict(state=observation[t], action=np.int64(t), reward=float(t), nextstate=nextstate[t], done=t == length - 1) for t in range(length)]
+
+def _check(transitions, columns):
+    for k in ('state', 'action', 'reward', 'nextstate', 'done'):
+        np.testing.assert_array_equal(np.asarray(columns[k]), np.stack([x[k] for x in transitions]))
+
+@pytest.mark.parametrize("dedup", [False, True])
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+@pytest.mark.parametrize("shared", [True, False])
+def test_columns_round_trip(tmp_path, dedup, codec, shared):
+    transitions = _episode(shared=shared)
+    file, = ColumnStorage(codec, chunk_size=3, dedup=dedup).write(tmp_path, "00000000", transitions)
+    (name, columns), = list(read_columns(file))
+    assert name == "00000000"
+    _check(transitions, columns)
+
+@pytest.mark.parametrize("dedup", [False, True])
+@pytest.mark.parametrize("shared", [True, False])
+def test_npy_round_trip(tmp_path, dedup, shared):
+    transitions = _episode(shared=shared)
+    directory, = NpyStorage(dedup=dedup).write(tmp_path, "00000000", transitions)
+    written = pathlib.Path(directory, f"{OBSERVATION}.npy").exists()
+    assert written == (dedup and shared) # observations that are not shared are written as they are
+    episode = Episode(directory)
+    assert sorted(episode.keys()) == ['action', 'done', 'nextstate', 'reward', 'state']
+    assert len(episode) == len(transitions)
+    _check(transitions, dict(episode.items()))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   Tests for VecIterator with a gym VectorEnv: finished trajectories are split into separate episodes with the format of a single environment.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import collections
+import numpy as np
+import pytest
+
+gym = pytest.importorskip("gym")
+
+from thesisdata.utils._vec import VecIterator, VectorEnvWrapper
+
+Transition = collections.namedtuple("Transition", ["state", "action", "reward", "nextstate", "done"])
+
+class CountingVectorEnv(gym.vector.VectorEnv):
+    # the observation counts the steps of each environment, environment i finishes after i + 2 steps
+    def __init__(self, num_envs=3):
+        super().__init__(num_envs, gym.spaces.Box(0, np.inf, shape=(2,)), gym.spaces.Discrete(4))
+        self._t = np.zeros(num_envs, dtype=np.int64)
+        self._observations = np.zeros((num_envs, 2), dtype=np.float32) # reused, as some vec envs do
+
+    def seed(self, seed=None):
+        return [seed]
+
+    def reset_wait(self, **kwargs):
+        self._t[:] = 0
+        self._observations[:] = 0
+        return self._observations
+
+    def step_async(self, actions):
+        pass
+
+    def step_wait(self, **kwargs):
+        self._t += 1
+        self._observations[:] = self._t[:, None]
+        dones = self._t >= np.arange(self.num_envs) + 2
+        infos = [dict() for _ in range(self.num_envs)]
+        for i in np.nonzero(dones)[0]:
+            infos[i]["terminal_observation"] = self._observations[i].copy()
+            self._t[i] = 0
+            self._observations[i] = 0
+        return self._observations, np.ones(self.num_envs, dtype=np.float32), dones, infos
+
+@pytest.mark.parametrize("batch_dim", [False, True])
+def test_episodes(batch_dim):
+    venv = CountingVectorEnv()
+    iterator = VecIterator(VectorEnvWrapper(venv), policy=lambda x: venv.action_space.sample(), mode=Transition, batch_dim=batch_dim)
+    assert iterator.env.observation_space.shape == (2,)
+    iterator.seed(0)
+    for length in [2, 3, 2, 4]: # in the order they finish
+        episode = list(iterator)
+        assert len(episode) == length
+        state = np.stack([x.state for x in episode])
+        nextstate = np.stack([x.nextstate for x in episode])
+        assert state.shape == ((length, 1, 2) if batch_dim else (length, 2))
+        np.testing.assert_array_equal(state.reshape(length, 2)[:, 0], np.arange(length))
+        np.testing.assert_array_equal(nextstate.reshape(length, 2)[:, 0], np.arange(length) + 1)
+        assert np.all(np.array([x.done for x in episode]).reshape(-1) == (np.arange(length) == length - 1))
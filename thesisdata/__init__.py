@@ -7,5 +7,18 @@ __author__ = "Benedict Wilkins"
 __email__ = "benrjw@gmail.com"
 __status__ = "Development"
 
-from . import transform
-from .utils import *
+import importlib
+
+from . import utils as _utils
+globals().update({name:getattr(_utils, name) for name in _utils._EAGER})
+__all__ = [*_utils.__all__, "transform"] # star imports resolve the lazy names (importing their modules)
+
+def __getattr__(name): # transform (torch, torchvision, cv2) and parts of utils (gym, omegaconf, ...) are imported on first use.
+    if name == "transform":
+        return importlib.import_module(".transform", __name__)
+    if name in _utils._LAZY:
+        return getattr(_utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_utils._LAZY.keys()) | {"transform"})
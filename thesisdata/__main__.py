@@ -9,11 +9,10 @@ __status__ = "Development"
 
 import argparse
 import pathlib
-import gymu
 import json
 import numpy as np
 
-from .utils import getLogger, resolve_class, GymDatasetWriter
+from .utils import getLogger, Manifest, load_plan, plan_args, parse_size, CODECS, STORAGE, DEFAULT_CHUNK_SIZE
 Logger = getLogger()
 
 ROOT_PATH = pathlib.Path("~/.data/").expanduser().resolve()
@@ -32,46 +31,105 @@ parser.add_argument("--path", "-p", type=str, default="{env_id}/{policy}", help=
 parser.add_argument("--policy", "-b", type=str, default="gymu.policy.Uniform", help="Fully qualified class path of the policy to use. Defaults to a uniform policy.")
 parser.add_argument("--num_episodes", "-n", type=int, default=1, help="Number of episodes to generate.")
 parser.add_argument("--max_episode_length", "-l", type=int, default=10000, help="Maximum episode length.")
-# TODO parser.add_argument("--min_episode_length", "-k", type=int, default=100, help="Discard an episode if its below this length.")
+parser.add_argument("--min_episode_length", type=int, default=0, help="Discard an episode if its below this length, discarded episodes are regenerated.")
+parser.add_argument("--max_retries", type=int, default=100, help="Maximum number of times an episode may be discarded (see --min_episode_length) before giving up.")
 parser.add_argument("--mode", "-m", type=str, default="sardi", help=", see gymu.mode")
 parser.add_argument("--append", "-a", default=False, action='store_true', help="Whether to append episodes to an already existing directory.")
+parser.add_argument("--resume", "-r", default=False, action='store_true', help="Resume an unfinished run, unfinished episodes are removed and episodes are written until the directory contains --num_episodes episodes. Implies --append.")
 parser.add_argument("--env_kwargs", "-k", default={}, type=json.loads, help="Additional arguments for the environment, given as dictionary string e.g. \"{'a':1}\"")
+parser.add_argument("--shard_size", type=parse_size, default=None, help="Pack consecutive episodes into tar shards of this size e.g. '512MB', an index of episodes is written to shards.yaml. Defaults to one file per episode.")
+parser.add_argument("--storage", type=str, default=None, choices=list(STORAGE.keys()), help="Storage backend, 'npy' writes uncompressed arrays that can be memory mapped (see thesisdata.utils.DatasetReader). Defaults to 'columns' if --codec is given, otherwise 'gymu'.")
+parser.add_argument("--codec", "-c", type=str, default=None, choices=list(CODECS.keys()), help="Write episodes as chunked columns compressed with this codec ('none' is uncompressed). Defaults to gymu.data.write_episode.")
+parser.add_argument("--chunk_size", type=int, default=DEFAULT_CHUNK_SIZE, help="Number of transitions in each column chunk (see --codec).")
+parser.add_argument("--raw_observations", default=False, action='store_true', help="Write image observations with their original dtype and layout (e.g. uint8 HWC), the float/CHW conversion is recorded in meta.yaml and done when reading (see thesisdata.utils.ObservationView).")
+parser.add_argument("--dedup", default=False, action='store_true', help="Write state and nextstate once per episode as a single observation sequence (--storage columns/npy or --shard_size), state/nextstate pairs are views of it when reading.")
+parser.add_argument("--keyframe_interval", type=int, default=0, help="With --storage replay, also write the observation every this many steps, used to check that replayed episodes match. Defaults to 0 (no keyframes).")
+parser.add_argument("--write_queue", type=int, default=0, help="Write finished episodes on a background thread while the next is generated, at most this many episodes are queued in memory. Defaults to 0 (write synchronously).")
+parser.add_argument("--profile", default=False, action='store_true', help="Time each stage of generation (env, policy, convert, write), statistics are written to <PATH>/profile.jsonl and summarised in meta.yaml.")
+parser.add_argument("--seed", "-s", type=int, default=None, help="Base random seed, episode i is seeded with seed + i. A random seed is chosen (and saved to meta.yaml) if not given.")
+parser.add_argument("--n_envs", type=int, default=1, help="Number of environments to step together with a batched policy (stable_baselines3 policies only, gym vector environments e.g. MNISTVector-v0 take num_envs in --env_kwargs).")
+parser.add_argument("--vec_env", type=str, default="subproc", choices=["subproc", "dummy"], help="Vec env used when --n_envs > 1, 'subproc' steps each environment in its own process.")
+parser.add_argument("--workers", "-w", type=int, default=1, help="Number of worker processes used to generate episodes.")
 
 parser.add_argument("--train", default=False, action='store_true', help="Generate training data, append 'train' to path.")
 parser.add_argument("--validate", default=False, action='store_true', help="Generate validation data, append 'validate' to path.")
 parser.add_argument("--test", default=False, action='store_true', help="Generate testing data, append 'test' to path.")
 
+parser.add_argument("--policy_eps", type=float, default=0.1, help="Probability of taking a random action (stable_baselines3 policies only).")
+parser.add_argument("--compile_policy", default=False, action='store_true', help="Use a traced, inference-only copy of the policy network, actions are sampled from the same distribution (stable_baselines3 A2C/PPO with discrete actions and DQN only).")
+parser.add_argument("--policy_threads", type=int, default=None, help="Number of torch threads used for policy inference in each process (stable_baselines3 policies only). Defaults to the torch default.")
+parser.add_argument("--share_policy", default=False, action='store_true', help="With --workers, hold a single copy of the policy in a server process that runs the observations of all workers as one batch (stable_baselines3 policies with discrete actions only).")
+parser.add_argument("--plan", type=load_plan, default=None, help="""Generate several datasets in one process, reusing the environment and policy. A JSON string (or .json/.yaml file) mapping split to number of episodes e.g. '{"train":50,"test":20}', or a list of entries that override arguments e.g. '[{"split":"train","num_episodes":50,"policy_eps":0.5}]'.""")
+
 args = parser.parse_args()
 
+from .utils import GymDatasetWriter, make_iterator, write_parallel, environment_args # imports gym, gymu... after parsing so that --help is fast
+
+def generate(args, iterator=None):
+    write_mode = 'a' if args.append or args.resume else 'w'
+
+    path = resolve_path(args, args.path)
+    Logger.info(f"Dataset path: {path}")
+
+    if args.seed is None and args.resume:
+        args.seed = Manifest(path).seed # continue with the seed of the unfinished run
+    if args.seed is None:
+        args.seed = int(np.random.randint(2**31 - args.num_episodes)) # fixed before creating any workers so that they agree
+
+    if args.workers > 1:
+        write_parallel(args, path, args.num_episodes, args.workers, write_mode=write_mode, resume=args.resume)
+        return
+    iterator = iterator if iterator is not None else make_iterator(args)
+    writer = GymDatasetWriter(path, iterator, write_mode=write_mode, seed=args.seed, 
+                                shard_size=args.shard_size, 
+                                raw_observations=args.raw_observations, 
+                                storage=args.storage, 
+                                codec=args.codec, 
+                                chunk_size=args.chunk_size,
+                                min_episode_length=args.min_episode_length,
+                                max_retries=args.max_retries,
+                                profile=args.profile,
+                                write_queue=args.write_queue,
+                                dedup=args.dedup,
+                                keyframe_interval=args.keyframe_interval)
+    writer.write(args.num_episodes, resume=args.resume)
+    writer.close()
+    writer.write_config(environment_args=environment_args(args))
+
 path_append_index = np.array([args.train, args.validate, args.test])
 if path_append_index.sum() == 1:
+    if args.plan is not None:
+        raise ValueError("'--train', '--validate', '--test' cannot be used with '--plan', give the split of each entry in the plan.")
     path_append = np.array(['train', 'validate', 'test'])[path_append_index].item()
     args.path = str(pathlib.PurePath(args.path, path_append))
 elif path_append_index.sum() > 1:
     raise ValueError("Only one of '--train', '--validate', '--test' may be specified at a time.")
 
-write_mode = 'a' if args.append else 'w'
-
-if "stable_baselines3" in args.policy:
-    from .environment import sb3
-    env, policy = sb3.load(args)
-else: 
-    env = gymu.make(args.env_id, **args.env_kwargs)
-    policy = resolve_class(args.policy)(env)
-
-path = resolve_path(args, args.path)
-Logger.info(f"Dataset path: {path}")
-
-mode = gymu.mode.mode(args.mode)
-
-if gymu.intercept.interceptable(env):
-    iterator = gymu.intercept.InterceptIterator(env, policy=policy, mode=mode, max_length=args.max_episode_length)
+if args.plan is None:
+    generate(args)
 else:
-    iterator = gymu.iter.Iterator(env, policy=policy, mode=mode, max_length=args.max_episode_length)
+    iterators = dict() # environments and policies are loaded once and reused by each entry that uses them
+    offset = 0
+    for entry in args.plan:
+        entry_args = plan_args(args, entry)
+        if args.seed is not None and 'seed' not in entry: # entries must not share episode seeds
+            entry_args.seed = args.seed + offset
+            offset += entry_args.num_episodes
+        Logger.info(f"Plan entry: {entry}")
+        if entry_args.workers > 1:
+            generate(entry_args)
+            continue
+        key = json.dumps([entry_args.env_id, entry_args.policy, entry_args.env_kwargs, entry_args.mode, entry_args.max_episode_length, entry_args.n_envs, entry_args.vec_env], sort_keys=True)
+        if key not in iterators:
+            iterators[key] = make_iterator(entry_args)
+        iterator = iterators[key]
+        if hasattr(iterator, "discard"): # episodes buffered for the previous entry (see VecIterator)
+            iterator.discard()
+        policy = getattr(iterator.policy, "__wrapped__", iterator.policy) # may be timed, see Profiler
+        if hasattr(policy, "eps"):
+            policy.eps = entry_args.policy_eps
+        generate(entry_args, iterator=iterator)
 
-writer = GymDatasetWriter(path, iterator, write_mode=write_mode)
-writer.write(args.num_episodes)
-writer.write_config()
 
 
 
@@ -11,4 +11,5 @@ from gym.envs import register
 
 def register_entry_point(): # entry point hook for openai gym
    register(id="MNIST-v0", entry_point="thesisdata.environment.mnist:MNISTEnvironment")
+   register(id="MNISTVector-v0", entry_point="thesisdata.environment.mnist:MNISTVectorEnvironment")
 
@@ -7,14 +7,14 @@ __author__ = "Benedict Wilkins"
 __email__ = "benrjw@gmail.com"
 __status__ = "Development"
 
+import os
+import uuid
 import numpy as np
-import torch
-import torchvision
 import itertools
 import pathlib
 import gym
 
-__all__ = ("MNISTEnvironment",)
+__all__ = ("MNISTEnvironment", "MNISTVectorEnvironment", "MNISTGather", "MNISTGroupedData")
 
 # path to download mnist data...
 MNIST_PATH = pathlib.Path(__file__)
@@ -25,35 +25,143 @@ class MNISTTrainData:
     __INSTANCE__ = None
     def __new__(cls):
         if MNISTTrainData.__INSTANCE__ is None:
-            __INSTANCE__ = super().__new__(cls)
-            __INSTANCE__.dataset = torchvision.datasets.MNIST(str(MNIST_PATH), train=True, transform=torchvision.transforms.ToTensor(), download=True)
-        return __INSTANCE__
+            import torchvision
+            MNISTTrainData.__INSTANCE__ = super().__new__(cls)
+            MNISTTrainData.__INSTANCE__.dataset = torchvision.datasets.MNIST(str(MNIST_PATH), train=True, transform=torchvision.transforms.ToTensor(), download=True)
+        return MNISTTrainData.__INSTANCE__
 
 class MNISTTestData:    
     __INSTANCE__ = None
     def __new__(cls):
-        if MNISTTrainData.__INSTANCE__ is None:
-            __INSTANCE__ = super().__new__(cls)
-            __INSTANCE__.dataset = torchvision.datasets.MNIST(str(MNIST_PATH), train=False, transform=torchvision.transforms.ToTensor(), download=True)
-        return __INSTANCE__
+        if MNISTTestData.__INSTANCE__ is None:
+            import torchvision
+            MNISTTestData.__INSTANCE__ = super().__new__(cls)
+            MNISTTestData.__INSTANCE__.dataset = torchvision.datasets.MNIST(str(MNIST_PATH), train=False, transform=torchvision.transforms.ToTensor(), download=True)
+        return MNISTTestData.__INSTANCE__
 
-class MNISTEnvironment(gym.Env):
+class MNISTGroupedData:
+    """ 
+        MNIST images grouped by class, shared by every environment in a process (and by processes through the page cache). The grouping is done once with a single 
+        argsort and saved next to MNIST_PATH as .npy files that are memory mapped read-only, torchvision is only needed the first time.
 
-    def __init__(self, num_actions=2, train=True, max_episode_length=4096):
-        super().__init__()
-        if train:
-            dataset = MNISTTrainData().dataset
-        else:
-            dataset = MNISTTestData().dataset
+        images[offsets[c]:offsets[c] + sizes[c]] are the (uint8) images of class c, order[i] is the index of images[i] in the torchvision dataset.
+    """
+    __INSTANCES__ = dict()
+    FIELDS = ("images", "order", "rank", "sizes", "offsets")
+
+    def __new__(cls, train=True):
+        if train not in MNISTGroupedData.__INSTANCES__:
+            instance = super().__new__(cls)
+            instance._load(train)
+            MNISTGroupedData.__INSTANCES__[train] = instance
+        return MNISTGroupedData.__INSTANCES__[train]
+
+    @staticmethod
+    def path(train=True):
+        return pathlib.Path(MNIST_PATH, "grouped", "train" if train else "test")
+
+    def _load(self, train):
+        path = MNISTGroupedData.path(train)
+        if not all(pathlib.Path(path, f"{f}.npy").exists() for f in MNISTGroupedData.FIELDS):
+            MNISTGroupedData._save(train, path)
+        for f in MNISTGroupedData.FIELDS:
+            setattr(self, f, np.load(pathlib.Path(path, f"{f}.npy"), mmap_mode='r'))
+
+    @staticmethod
+    def _save(train, path):
+        dataset = MNISTTrainData().dataset if train else MNISTTestData().dataset
+        x, y = dataset.data.numpy(), dataset.targets.numpy()
+        order = np.argsort(y, kind="stable") # dataset indices grouped by class (in dataset order within each class)
+        sizes = np.bincount(y)
+        fields = dict(images=x[order], order=order, rank=np.argsort(order), sizes=sizes, offsets=np.concatenate([[0], np.cumsum(sizes)[:-1]]))
+        path.mkdir(parents=True, exist_ok=True)
+        for f, value in fields.items(): # other processes may be doing the same, files are moved into place atomically
+            tmp = pathlib.Path(path, f".{f}-{uuid.uuid4().hex[:8]}.npy")
+            np.save(tmp, value, allow_pickle=False)
+            os.replace(tmp, pathlib.Path(path, f"{f}.npy"))
+
+    def gather(self, group, index):
+        """ Position (in images) of the index-th image of each group, indices wrap around. """
+        return self.offsets[group] + index % self.sizes[group]
+
+    def float_images(self, i):
+        """ [0-1] float32 images with a channel dimension (N,1,28,28). """
+        return (self.images[i].astype(np.float32) / np.float32(255.))[...,None,:,:]
+
+    def uint8_images(self, i):
+        """ uint8 images with a channel dimension (N,1,28,28), a copy (the images are read-only). """
+        return np.array(self.images[i])[...,None,:,:]
+
+    def observations(self, i, obs_dtype="float32"):
+        return self.uint8_images(i) if obs_dtype == "uint8" else self.float_images(i)
+
+OBS_DTYPES = ("float32", "uint8")
+
+def _observation_space(data, observation, obs_dtype):
+    if observation not in ("image", "index"):
+        raise ValueError(f"Invalid observation: {observation}, must be one of ['image', 'index']")
+    if obs_dtype not in OBS_DTYPES:
+        raise ValueError(f"Invalid obs_dtype: {obs_dtype}, must be one of {list(OBS_DTYPES)}")
+    if observation == "index":
+        return gym.spaces.Discrete(len(data.order))
+    if obs_dtype == "uint8":
+        return gym.spaces.Box(0,255,shape=(1, *data.images.shape[1:]),dtype=np.uint8)
+    return gym.spaces.Box(0,1,shape=(1, *data.images.shape[1:]))
+
+def _sample_actions(action_space, size):
+    # the same as size calls to action_space.sample(), numpy draws batched and sequential integers identically.
+    random = action_space.np_random
+    sample = getattr(random, "integers", None) or random.randint # Generator or RandomState (older gym)
+    return getattr(action_space, "start", 0) + sample(action_space.n, size=size)
+
+class MNISTGather:
+
+    def __init__(self, train=True, obs_dtype="float32", keys=('state', 'nextstate')):
+        """ Rebuild the image observations of a dataset written with MNISTEnvironment(observation="index"), a single gather per field. May be used with dataset.map. 
+
+        Args:
+            train (bool, optional): whether the indices refer to the MNIST train or test set. Defaults to True.
+            obs_dtype (str, optional): "float32" for [0-1] float images, "uint8" for raw images. Defaults to "float32".
+            keys (tuple, optional): observation fields. Defaults to ('state', 'nextstate').
+        """
+        self.data = MNISTGroupedData(train)
+        self.obs_dtype = obs_dtype
+        self.keys = keys
+
+    @classmethod
+    def from_meta(cls, meta, **kwargs):
+        reference = meta['observation_reference']
+        return cls(train=reference.get('train', True), obs_dtype=reference.get('obs_dtype', "float32"), **kwargs)
+
+    def __call__(self, x):
+        x = dict(x.items())
+        for k in self.keys:
+            if k in x:
+                index = np.asarray(x[k])
+                images = self.data.observations(self.data.rank[index.reshape(-1)], self.obs_dtype) # same as observation="image"
+                x[k] = images.reshape(*index.shape, *images.shape[1:])
+        return x
+
+class MNISTEnvironment(gym.Env):
 
-        x, y = dataset.data.float() / 255., dataset.targets
+    def __init__(self, num_actions=2, train=True, max_episode_length=4096, observation="image", obs_dtype="float32"):
+        """ Each action moves to the next digit class (x + action + 1) % 10, observations are randomly chosen images of the current class.
 
-        self._groups = [y == i for i in range(y.max() + 1)]
-        self._groups = [(x[i], y[i]) for i in self._groups]
-        self._groups = [x.unsqueeze(1) for x,_ in self._groups]
+        Args:
+            num_actions (int, optional): number of actions. Defaults to 2.
+            train (bool, optional): use the MNIST train set, otherwise the test set. Defaults to True.
+            max_episode_length (int, optional): maximum episode length. Defaults to 4096.
+            observation (str, optional): "image" for images, "index" for the index of the image in the MNIST dataset (images are rebuilt when reading, see MNISTGather). Defaults to "image".
+            obs_dtype (str, optional): "float32" for [0-1] float images, "uint8" for the raw [0-255] images (4x smaller, convert at the model input). Defaults to "float32".
+        """
+        super().__init__()
+        self.train = train
+        self.observation = observation
+        self.obs_dtype = obs_dtype
+        self._data = MNISTGroupedData(train) # shared, see MNISTGroupedData
         
         self.action_space = gym.spaces.Discrete(num_actions)
-        self.observation_space = gym.spaces.Box(0,1,shape=self._groups[0].shape[1:])
+        self.observation_space = _observation_space(self._data, observation, obs_dtype)
         
         self._index = 0
         self._step = 0
@@ -61,22 +169,130 @@ class MNISTEnvironment(gym.Env):
         self._current_group = self._random.integers(0, self.action_space.n)
         self.max_episode_length = max_episode_length
 
+    def seed(self, seed=None):
+        self._random = np.random.default_rng(seed)
+        return [seed]
+
+    def observation_reference(self):
+        """ Source of the observations if they are dataset indices, saved to meta.yaml by GymDatasetWriter (see thesisdata.utils.load_reference). """
+        if self.observation == "image":
+            return None
+        return dict(entry_point="thesisdata.environment.mnist.MNISTGather", train=self.train, obs_dtype=self.obs_dtype)
+
+    def _observation(self, group, index):
+        i = self._data.gather(group, index)
+        if self.observation == "index":
+            return np.int64(self._data.order[i])
+        return self._data.observations(i, self.obs_dtype)
+
     def get_action_meanings(self):
         return [f"(x+{i + 1}) % {self.action_space.n}" for i in range(self.action_space.n)]
 
     def step(self, action):
         assert action in self.action_space
-        self._current_group = (self._current_group + action + 1) % (len(self._groups)) 
-        group = self._groups[self._current_group]
+        self._current_group = (self._current_group + action + 1) % (len(self._data.sizes)) 
         self._index += self._random.integers(1, 20) # 20 gives some randomness to the transitions...
         self._step += 1
         done = self._step >= self.max_episode_length
-        state = group[self._index % group.shape[0]]
+        state = self._observation(self._current_group, self._index)
         reward = 0.
-        return state.numpy(), reward, done, dict(label=self._current_group)
+        return state, reward, done, dict(label=self._current_group)
 
     def reset(self): # random starting index
         self._index, self._step = 0, 0
         self._current_group = self._random.integers(0, self.action_space.n)
-        return self._groups[self._current_group][self._index].numpy(), dict(label=self._current_group)
+        return self._observation(self._current_group, self._index), dict(label=self._current_group)
+
+    def sample_episode(self, actions=None, max_length=None):
+        """ Sample a whole episode (from reset) in a single vectorized pass: groups are a cumulative sum of (action + 1), indices a cumulative sum of random increments 
+            and the observations a single gather. The same random numbers are drawn as by reset followed by step until done (with actions from action_space.sample()), 
+            so a seeded episode is identical to one generated step by step. Used by GymDatasetWriter when the policy is gymu.policy.Uniform.
+
+        Args:
+            actions (np.ndarray, optional): actions of the episode, e.g. of a fixed policy. Defaults to None (uniformly random actions sampled from the action space).
+            max_length (int, optional): maximum number of steps. Defaults to None (max_episode_length).
+
+        Returns:
+            dict: observation (length + 1, state[t] is observation[t] and nextstate[t] is observation[t+1]), action, reward, done (length) and label (length + 1).
+        """
+        length = self.max_episode_length if max_length is None else min(max_length, self.max_episode_length)
+        if actions is None:
+            actions = _sample_actions(self.action_space, length)
+        actions = np.asarray(actions)[:length]
+        length = len(actions)
+        group = np.empty(length + 1, dtype=np.int64)
+        group[0] = self._random.integers(0, self.action_space.n)
+        group[1:] = actions + 1
+        group = np.cumsum(group) % len(self._data.sizes)
+        index = np.zeros(length + 1, dtype=np.int64)
+        index[1:] = np.cumsum(self._random.integers(1, 20, size=length))
+        self._current_group, self._index, self._step = group[-1], index[-1], length
+        i = self._data.gather(group, index)
+        observation = self._data.order[i] if self.observation == "index" else self._data.observations(i, self.obs_dtype)
+        done = np.arange(1, length + 1) >= self.max_episode_length
+        return dict(observation=observation, action=actions, reward=np.zeros(length), done=done, label=group)
+
+class MNISTVectorEnvironment(gym.vector.VectorEnv):
+
+    def __init__(self, num_envs=32, num_actions=2, train=True, max_episode_length=4096, observation="image", obs_dtype="float32"):
+        """ num_envs MNISTEnvironments stepped together, the group transitions, index increments and image gathers are array operations over the batch. 
+            Environments are reset automatically when their episode ends, the last observation of the episode is given as info["terminal_observation"].
+
+        Args:
+            num_envs (int, optional): number of environments. Defaults to 32.
+            num_actions (int, optional): see MNISTEnvironment. Defaults to 2.
+            train (bool, optional): see MNISTEnvironment. Defaults to True.
+            max_episode_length (int, optional): see MNISTEnvironment. Defaults to 4096.
+            observation (str, optional): see MNISTEnvironment. Defaults to "image".
+            obs_dtype (str, optional): see MNISTEnvironment. Defaults to "float32".
+        """
+        self.train = train
+        self.observation = observation
+        self.obs_dtype = obs_dtype
+        self._data = MNISTGroupedData(train) # shared, see MNISTGroupedData
+        observation_space = _observation_space(self._data, observation, obs_dtype)
+        super().__init__(num_envs, observation_space, gym.spaces.Discrete(num_actions))
+        self.max_episode_length = max_episode_length
+        self._random = np.random.default_rng()
+        self._group = np.zeros(num_envs, dtype=np.int64)
+        self._index = np.zeros(num_envs, dtype=np.int64)
+        self._step = np.zeros(num_envs, dtype=np.int64)
+        self._actions = None
+
+    def seed(self, seed=None):
+        self._random = np.random.default_rng(seed)
+        return [seed]
+
+    def get_action_meanings(self):
+        return [f"(x+{i + 1}) % {self.single_action_space.n}" for i in range(self.single_action_space.n)]
 
+    def _observation(self, envs=slice(None)):
+        i = self._data.gather(self._group[envs], self._index[envs])
+        if self.observation == "index":
+            return self._data.order[i]
+        return self._data.observations(i, self.obs_dtype)
+
+    def _reset(self, envs):
+        self._index[envs], self._step[envs] = 0, 0
+        self._group[envs] = self._random.integers(0, self.single_action_space.n, size=len(self._group[envs]))
+
+    def reset_wait(self, **kwargs):
+        self._reset(slice(None))
+        return self._observation()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions)
+
+    def step_wait(self, **kwargs):
+        self._group = (self._group + self._actions + 1) % len(self._data.sizes)
+        self._index += self._random.integers(1, 20, size=self.num_envs) # 20 gives some randomness to the transitions...
+        self._step += 1
+        dones = self._step >= self.max_episode_length
+        observations = self._observation()
+        infos = [dict(label=int(g)) for g in self._group]
+        if dones.any():
+            for i in np.nonzero(dones)[0]:
+                infos[i]["terminal_observation"] = np.copy(observations[i])
+            self._reset(dones)
+            observations[dones] = self._observation(dones)
+        return observations, np.zeros(self.num_envs, dtype=np.float32), dones, infos
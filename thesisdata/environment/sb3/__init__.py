@@ -21,9 +21,11 @@ import gymu
 import gym
 
 from .sb3_zoo_utils import ALGOS, create_test_env, get_saved_hyperparams
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 
 # it doesnt like relative imports here??? wtf.
 from thesisdata.utils._logging import getLogger
+from thesisdata.utils._vec import VecIterator # moved, it does not depend on stable_baselines3 (gym VectorEnvs use it too)
 Logger = getLogger()
 
 from thesisdata.utils import get_project_root_directory, resolve_class
@@ -31,6 +33,8 @@ from thesisdata.utils import get_project_root_directory, resolve_class
 DEFAULT_MODEL_PATH = pathlib.Path(__file__).parent
 DEFAULT_MODEL_PATH = pathlib.Path(DEFAULT_MODEL_PATH, "rl-trained-agents/")
 
+VEC_ENV_CLS = dict(dummy=DummyVecEnv, subproc=SubprocVecEnv)
+
 class SB3PolicyWrapper: # wrap the s3b policy so that randomness may be introduced & works with gymu iterators.
 
    def __init__(self, policy, action_space, eps=0, deterministic=False):
@@ -42,11 +46,13 @@ class SB3PolicyWrapper: # wrap the s3b policy so that randomness may be introduc
 
    def __call__(self, state):
       # TODO recurrent policies not supported... reset is a bit tricky...
-      if np.random.uniform() > self.eps:
-         action, self.hidden_state = self.policy.predict(state, deterministic=self.deterministic)
-      else:
-         action = self.action_space.sample() # TODO this doesnt work out of the box... which is annoying! maybe create an issue or something?
-         action = np.array([action])
+      # state is a batch of observations (one per environment in the vec env), each environment explores independently.
+      explore = np.random.uniform(size=state.shape[0]) <= self.eps
+      if explore.all(): # no need to run the policy
+         return np.array([self.action_space.sample() for _ in range(state.shape[0])]) # TODO this doesnt work out of the box... which is annoying! maybe create an issue or something?
+      action, self.hidden_state = self.policy.predict(state, deterministic=self.deterministic)
+      for i in np.nonzero(explore)[0]:
+         action[i] = self.action_space.sample()
       return action
 
 class InfoWrapper(gym.Wrapper): # get atari envs to conform to gym API.
@@ -55,10 +61,42 @@ class InfoWrapper(gym.Wrapper): # get atari envs to conform to gym API.
       return state, reward, done, info[0]
    def reset(self):
       return self.env.reset(), {}
-      
-def load(args):
-   # use pretrained models...
-   path = pathlib.Path(DEFAULT_MODEL_PATH, args.policy.split(".")[-1].lower(), f"{args.env_id}_1")
+
+def _model_path(args):
+   return pathlib.Path(DEFAULT_MODEL_PATH, args.policy.split(".")[-1].lower(), f"{args.env_id}_1")
+
+def load_model(args, env=None):
+   # LOAD POLICY
+   path = _model_path(args)
+   policy_cls = resolve_class(args.policy)
+   
+   checkpoints = glob.glob(str(pathlib.PurePath(path, "**/*.zip")), recursive=True)
+   checkpoint_path = checkpoints[-1] # there should only be one...
+   Logger.info(f"Using policy checkpoint: {checkpoint_path}")
+   policy_kwargs = {}
+   policy_kwargs['buffer_size'] = 1 # dont need a buffer...
+
+   newer_python_version = sys.version_info.major == 3 and sys.version_info.minor >= 8
+   custom_objects = {}
+   if newer_python_version:
+      custom_objects = {
+         "learning_rate": 0.0,
+         "lr_schedule": lambda _: 0.0,
+         "clip_range": lambda _: 0.0,
+      }
+
+   policy = policy_cls.load(checkpoint_path, env, custom_objects=custom_objects, **policy_kwargs)
+   if args.__dict__.get('compile_policy', False): # traced inference-only actor, see inference.InferencePolicy
+      from .inference import InferencePolicy
+      policy = InferencePolicy(policy, num_threads=args.__dict__.get('policy_threads', None))
+   elif args.__dict__.get('policy_threads', None) is not None:
+      import torch
+      torch.set_num_threads(args.policy_threads)
+   return policy
+
+def load_env(args):
+   # the environment of a pretrained model, with the same wrappers that the model was trained with.
+   path = _model_path(args)
    env_id = args.env_id
    env_kwargs = args.env_kwargs
    Logger.info(f"Using SB3 path: {path}")
@@ -80,37 +118,25 @@ def load(args):
 
    env = create_test_env(
          env_id,
-         n_envs=1,
+         n_envs=args.__dict__.get('n_envs', 1), # > 1 steps environments in lock-step, see VecIterator
+         vec_env_cls=VEC_ENV_CLS[args.__dict__.get('vec_env', 'subproc')],
          stats_path=stats_path,
-         seed=args.__dict__.get('seed', np.random.randint(100000)),
+         seed=args.seed if args.__dict__.get('seed') is not None else np.random.randint(100000),
          log_dir=None, # logdir?
          should_render=False,
          hyperparams=hyperparams,
          env_kwargs=env_kwargs,
       )
-   env = InfoWrapper(env)
+   return InfoWrapper(env)
 
-   # LOAD POLICY
-   policy_cls = resolve_class(args.policy)
-   
-   checkpoints = glob.glob(str(pathlib.PurePath(path, "**/*.zip")), recursive=True)
-   checkpoint_path = checkpoints[-1] # there should only be one...
-   Logger.info(f"Using policy checkpoint: {checkpoint_path}")
-   policy_kwargs = {}
-   policy_kwargs['buffer_size'] = 1 # dont need a buffer...
-
-   newer_python_version = sys.version_info.major == 3 and sys.version_info.minor >= 8
-   custom_objects = {}
-   if newer_python_version:
-      custom_objects = {
-         "learning_rate": 0.0,
-         "lr_schedule": lambda _: 0.0,
-         "clip_range": lambda _: 0.0,
-      }
-
-   policy = policy_cls.load(checkpoint_path, env, custom_objects=custom_objects, **policy_kwargs)
+def load(args):
+   # use pretrained models...
+   env = load_env(args)
+   server = args.__dict__.get('policy_server', None)
+   if server is not None: # the policy is held (and run in batches) by a shared server process, see server.PolicyServer
+      from .server import PolicyClient
+      policy = PolicyClient(server)
+   else:
+      policy = load_model(args, env)
    policy = SB3PolicyWrapper(policy, env.action_space, args.__dict__.get('policy_eps', 0.1), deterministic=False)
    return env, policy
-
-
-
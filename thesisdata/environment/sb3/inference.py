@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Inference-only fast path for pre-trained stable baselines policies. The actor network of the loaded model is traced (torch.jit.trace) and called under 
+   torch.inference_mode, observations are preprocessed in the same way as model.predict (transpose to channel first, float, scale images to [0-1]) 
+   without going through the per-call checks in stable baselines. Actions are sampled from the same distribution as model.predict.
+
+   Supported: actor-critic policies (A2C, PPO) with discrete action spaces, and DQN. Other models should use model.predict.
+   
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+import gym
+import torch
+
+from stable_baselines3.common.policies import ActorCriticPolicy
+from stable_baselines3.common.preprocessing import is_image_space
+from stable_baselines3.dqn.policies import DQNPolicy
+
+from thesisdata.utils._logging import getLogger
+Logger = getLogger()
+
+__all__ = ("InferencePolicy", "supports_inference")
+
+class _Actor(torch.nn.Module): # observation -> action logits (actor-critic) or q values (dqn)
+
+   def __init__(self, policy, scale):
+      super().__init__()
+      self.scale = scale
+      if isinstance(policy, DQNPolicy):
+         self.features_extractor = policy.q_net.features_extractor
+         self.latent = torch.nn.Identity()
+         self.head = policy.q_net.q_net
+      else:
+         self.features_extractor = getattr(policy, "pi_features_extractor", policy.features_extractor)
+         self.latent = _ForwardActor(policy.mlp_extractor)
+         self.head = policy.action_net
+
+   def forward(self, obs):
+      x = obs.float()
+      if self.scale:
+         x = x / 255.
+      return self.head(self.latent(self.features_extractor(x)))
+
+class _ForwardActor(torch.nn.Module):
+
+   def __init__(self, mlp_extractor):
+      super().__init__()
+      self.mlp_extractor = mlp_extractor
+
+   def forward(self, features):
+      return self.mlp_extractor.forward_actor(features)
+
+def supports_inference(model):
+   """ Whether the InferencePolicy fast path can be used with the given stable baselines model. """
+   policy = model.policy
+   if isinstance(policy, DQNPolicy):
+      return True
+   return isinstance(policy, ActorCriticPolicy) and isinstance(policy.action_space, gym.spaces.Discrete) and isinstance(policy.observation_space, gym.spaces.Box)
+
+class InferencePolicy:
+
+   def __init__(self, model, num_threads=None, trace=True):
+      """ Inference-only replacement for a stable baselines model, has the same predict method so it may be used with SB3PolicyWrapper. 
+
+      Args:
+         model (stable_baselines3.common.base_class.BaseAlgorithm): loaded model, see supports_inference.
+         num_threads (int, optional): number of intra-op threads used by torch in this process (e.g. 1 per worker when generating in parallel). Defaults to None (torch default).
+         trace (bool, optional): trace the actor network with torch.jit.trace. Defaults to True.
+      """
+      if not supports_inference(model):
+         raise ValueError(f"Inference fast path does not support {type(model).__name__} with {type(model.policy).__name__}, use model.predict.")
+      if num_threads is not None:
+         torch.set_num_threads(num_threads)
+      self.model = model
+      policy = model.policy
+      policy.set_training_mode(False)
+      self.observation_space = policy.observation_space
+      self.action_space = policy.action_space
+      self.device = policy.device
+      self.dqn = isinstance(policy, DQNPolicy)
+      self._image = is_image_space(self.observation_space)
+      self._actor = _Actor(policy, scale=self._image and policy.normalize_images).eval()
+      if trace:
+         example = torch.as_tensor(np.zeros((1, *self.observation_space.shape), dtype=self.observation_space.dtype), device=self.device)
+         with torch.inference_mode():
+            self._actor = torch.jit.trace(self._actor, example)
+         Logger.info(f"Traced {type(policy).__name__} actor for inference.")
+
+   def _preprocess(self, obs):
+      obs = np.asarray(obs)
+      if obs.shape == self.observation_space.shape: # a single observation
+         obs = obs[None]
+      if self._image and obs.shape[1:] != self.observation_space.shape: # channel last (VecTransposeImage is applied by the model, not the environment), see maybe_transpose
+         obs = np.transpose(obs, (0, 3, 1, 2))
+      return torch.as_tensor(np.ascontiguousarray(obs), device=self.device)
+
+   def predict(self, observation, state=None, episode_start=None, deterministic=False):
+      """ Same as model.predict, returns (actions, state). """
+      with torch.inference_mode():
+         out = self._actor(self._preprocess(observation))
+         if self.dqn or deterministic:
+            action = out.argmax(dim=1)
+         else:
+            action = torch.distributions.Categorical(logits=out).sample() # CategoricalDistribution in stable baselines
+      action = action.cpu().numpy()
+      if self.dqn and not deterministic and np.random.rand() < self.model.exploration_rate: # see DQN.predict
+         action = np.array([self.action_space.sample() for _ in range(action.shape[0])])
+      return action, state
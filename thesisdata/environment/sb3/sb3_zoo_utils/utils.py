@@ -194,6 +194,7 @@ def create_test_env(
     should_render: bool = True,
     hyperparams: Optional[Dict[str, Any]] = None,
     env_kwargs: Optional[Dict[str, Any]] = None,
+    vec_env_cls: Optional[Callable[..., VecEnv]] = None,
 ) -> VecEnv:
     """
     Create environment for testing a trained agent
@@ -206,6 +207,7 @@ def create_test_env(
     :param should_render: For Pybullet env, display the GUI
     :param hyperparams: Additional hyperparams (ex: n_stack)
     :param env_kwargs: Optional keyword argument to pass to the env constructor
+    :param vec_env_cls: VecEnv class to use when n_envs > 1, defaults to SubprocVecEnv
     :return:
     """
     # Avoid circular import
@@ -225,11 +227,14 @@ def create_test_env(
         del hyperparams["env_wrapper"]
 
     vec_env_kwargs = {}
-    vec_env_cls = DummyVecEnv
-    if n_envs > 1 or (ExperimentManager.is_bullet(env_id) and should_render):
+    if ExperimentManager.is_bullet(env_id) and should_render:
         # HACK: force SubprocVecEnv for Bullet env
         # as Pybullet envs does not follow gym.render() interface
         vec_env_cls = SubprocVecEnv
+    elif n_envs == 1:
+        vec_env_cls = DummyVecEnv
+    elif vec_env_cls is None:
+        vec_env_cls = SubprocVecEnv
         # start_method = 'spawn' for thread safe
 
     env = make_vec_env(
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Local policy inference server, a single process holds one copy of a pre-trained stable baselines policy and runs the observations of many generator 
+   processes as one batch. Observations and actions are exchanged through shared memory (one block per client), only small messages go through the queues.
+   PolicyClient has the same predict method as a stable baselines model, so it is used with SB3PolicyWrapper in the same way.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import os
+import time
+import queue
+import weakref
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+from thesisdata.utils._logging import getLogger
+Logger = getLogger()
+
+__all__ = ("PolicyServer", "PolicyClient")
+
+ACTION_DTYPE = np.dtype(np.int64) # discrete actions only
+POLL_INTERVAL = 1. # seconds between checks that the server is still running while a client waits for a response
+
+class _Handle: # passed to client processes when they are created (queues cannot be pickled otherwise)
+
+   def __init__(self, requests, responses, counter, running, pid):
+      self.requests = requests
+      self.responses = responses
+      self.counter = counter
+      self.running = running
+      self.pid = pid
+
+def _alive(handle):
+   if not handle.running.value:
+      return False
+   try:
+      os.kill(handle.pid, 0) # e.g. killed by the OOM killer, running is not cleared
+   except ProcessLookupError:
+      return False
+   except PermissionError:
+      pass
+   return True
+
+def _attach(shm, shape, dtype, n):
+   obs = np.ndarray((n, *shape), dtype=dtype, buffer=shm.buf)
+   actions = np.ndarray((n,), dtype=ACTION_DTYPE, buffer=shm.buf, offset=obs.nbytes)
+   return obs, actions
+
+def _open(name): # the client owns (and unlinks) the memory, it must not be tracked (and unlinked) here as well
+   shm = shared_memory.SharedMemory(name=name)
+   resource_tracker.unregister(shm._name, "shared_memory")
+   return shm
+
+def _serve(args, requests, responses, max_wait, running):
+   try:
+      from . import load_model
+      try:
+         model = load_model(args)
+      except Exception as e:
+         Logger.exception("Policy server failed to load the policy.")
+         _fail(requests, responses, repr(e))
+         return
+      _run(model, requests, responses, max_wait)
+   finally:
+      running.value = False
+
+def _fail(requests, responses, error): # every request is answered with the error until the server is closed
+   while (request := requests.get()) is not None:
+      responses[request[0]].put(error)
+
+def _run(model, requests, responses, max_wait):
+   Logger.info(f"Policy server ready ({type(model).__name__}).")
+   attached = dict() # client -> (name, capacity, shm, obs, actions)
+   running = True
+   while running:
+      batch = [requests.get()]
+      deadline = time.perf_counter() + max_wait
+      while len(batch) < len(responses): # wait a little for the other clients
+         try:
+            batch.append(requests.get(timeout=max(deadline - time.perf_counter(), 0)))
+         except queue.Empty:
+            break
+      running = all(r is not None for r in batch)
+      batch = [r for r in batch if r is not None]
+      for deterministic in (False, True):
+         group = [r for r in batch if r[-1] == deterministic]
+         if len(group) == 0:
+            continue
+         try:
+            for client, name, capacity, n, shape, dtype, _ in group:
+               if client not in attached or attached[client][0] != name:
+                  if client in attached:
+                     _detach(attached, client)
+                  shm = _open(name)
+                  attached[client] = (name, capacity, shm, *_attach(shm, shape, dtype, capacity))
+            obs = np.concatenate([attached[r[0]][3][:r[3]] for r in group])
+            actions, _ = model.predict(obs, deterministic=deterministic)
+            actions = np.asarray(actions).reshape(len(obs))
+            i = 0
+            for client, _, _, n, *_ in group:
+               attached[client][4][:n] = actions[i:i+n]
+               responses[client].put(None)
+               i += n
+         except Exception as e:
+            for r in group:
+               responses[r[0]].put(repr(e))
+   for client in list(attached.keys()):
+      _detach(attached, client)
+
+def _detach(attached, client):
+   shm = attached.pop(client)[2] # the arrays must be released before the memory is closed
+   shm.close()
+
+class PolicyServer:
+
+   def __init__(self, args, num_clients, max_wait=0.002, context=None):
+      """ Run a pre-trained stable baselines policy (see load_model) in a separate process for num_clients client processes (see PolicyClient). 
+
+      Args:
+         args (argparse.Namespace): command line arguments, used to load the policy.
+         num_clients (int): maximum number of client processes.
+         max_wait (float, optional): maximum time (seconds) to wait for other clients to fill a batch. Defaults to 0.002.
+         context (multiprocessing.context.BaseContext, optional): multiprocessing context. Defaults to None (spawn).
+      """
+      context = context if context is not None else multiprocessing.get_context("spawn")
+      self._requests = context.Queue()
+      self._responses = [context.Queue() for _ in range(num_clients)]
+      self._counter = context.Value('i', 0)
+      self._running = context.Value('b', True)
+      self._process = context.Process(target=_serve, args=(args, self._requests, self._responses, max_wait, self._running), daemon=True)
+
+   @property
+   def handle(self):
+      """ Pass to each client process when it is created (e.g. as an initializer argument), see PolicyClient. The server must have been started. """
+      return _Handle(self._requests, self._responses, self._counter, self._running, self._process.pid)
+
+   def start(self):
+      self._process.start()
+      return self
+
+   def close(self):
+      if self._process.is_alive():
+         self._requests.put(None)
+         self._process.join()
+
+   def __enter__(self):
+      return self.start()
+
+   def __exit__(self, *args):
+      self.close()
+
+class PolicyClient:
+
+   def __init__(self, handle):
+      """ Client of a PolicyServer, has the same predict method as a stable baselines model (discrete actions only). 
+
+      Args:
+         handle (_Handle): see PolicyServer.handle.
+      """
+      self._requests = handle.requests
+      self._handle = handle
+      with handle.counter.get_lock():
+         self.client = handle.counter.value
+         handle.counter.value += 1
+      if self.client >= len(handle.responses):
+         raise ValueError(f"Too many policy clients, the server was created for {len(handle.responses)}.")
+      self._response = handle.responses[self.client]
+      self._shm, self._capacity = None, 0
+
+   def _allocate(self, obs):
+      if self._shm is not None and self._capacity >= len(obs) and self._obs.shape[1:] == obs.shape[1:] and self._obs.dtype == obs.dtype:
+         return
+      if self._shm is not None:
+         self._obs, self._actions = None, None
+         self._finalize()
+      self._capacity = max(len(obs), 1)
+      size = self._capacity * (int(np.prod(obs.shape[1:])) * obs.dtype.itemsize + ACTION_DTYPE.itemsize)
+      self._shm = shared_memory.SharedMemory(create=True, size=size)
+      self._obs, self._actions = _attach(self._shm, obs.shape[1:], obs.dtype, self._capacity)
+      self._finalize = weakref.finalize(self, _release, self._shm)
+
+   def predict(self, observation, state=None, episode_start=None, deterministic=False):
+      """ Same as model.predict, observations must be batched. Returns (actions, state). """
+      obs = np.asarray(observation)
+      self._allocate(obs)
+      n = len(obs)
+      self._obs[:n] = obs
+      self._requests.put((self.client, self._shm.name, self._capacity, n, obs.shape[1:], obs.dtype.str, deterministic))
+      error = self._get()
+      if error is not None:
+         raise RuntimeError(f"Policy server failed: {error}")
+      return self._actions[:n].copy(), state
+
+   def _get(self):
+      while True:
+         try:
+            return self._response.get(timeout=POLL_INTERVAL)
+         except queue.Empty:
+            if not _alive(self._handle):
+               raise RuntimeError("Policy server is not running.")
+
+def _release(shm):
+   try:
+      shm.close()
+   except BufferError: # still referenced, it is unmapped when the process exits
+      pass
+   shm.unlink()
@@ -15,7 +15,8 @@ from . import _transform
 
 class MNISTTransform:
     """ 
-        Simple transform for MNIST images to get it into a usable format.: (1,H,W) [0-1] float32 
+        Simple transform for MNIST images to get it into a usable format.: (1,H,W) [0-1] float32. Accepts (N,H,W) or (N,1,H,W) uint8 images (e.g. MNISTEnvironment(obs_dtype="uint8")), 
+        float images are assumed to be in [0-1] already.
     """
     
     def __init__(self, device="cuda:0"):
@@ -23,7 +24,11 @@ class MNISTTransform:
         self.device = device
     
     def __call__(self, x):
-        x = x.unsqueeze(1).to(self.device).float()
+        if x.dim() == 3:
+            x = x.unsqueeze(1)
+        if x.is_floating_point():
+            return x.to(self.device)
+        x = x.to(self.device).float()
         x /= 255.
         return x
 
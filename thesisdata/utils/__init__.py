@@ -7,9 +7,60 @@ __author__ = "Benedict Wilkins"
 __email__ = "benrjw@gmail.com"
 __status__ = "Development"
 
+import importlib
 
 from ._utils import *
-from ._generate import *
 from ._logging import getLogger
-from ._generate import GymDatasetWriter
-from ._omegaconf import *
\ No newline at end of file
+from ._storage import *
+from ._shard import *
+from ._manifest import *
+from ._view import *
+from ._index import *
+from ._reader import *
+from ._profile import *
+from ._async import *
+from ._buffer import *
+from ._plan import *
+
+_EAGER = [name for name in globals() if not name.startswith("_") and name != "importlib"]
+
+# these modules import gym, gymu, omegaconf... they are only imported when one of their names is first used.
+_LAZY = dict(
+    GymDatasetWriter="._generate", make_iterator="._generate", make_environment="._generate", environment_args="._generate", count_episodes="._generate",
+    ReplayReader="._replay",
+    write_parallel="._parallel",
+    **{name:"._omegaconf" for name in ("omegaconf_resolver", "get_environment_config", "get_wrappers", "download_from_kaggle", "configure_environment", 
+                                       "symlinked", "omegaconfig_list_merge", "omegaconfig_slice")},
+)
+
+__all__ = _EAGER + list(_LAZY) # star imports resolve the lazy names (importing their modules)
+
+# OmegaConf resolvers used by the configs are registered on import (as they were before _omegaconf was imported lazily), _omegaconf is imported by the first call.
+_RESOLVERS = dict(environment=("configure_environment", dict(use_cache=True)), symlinked=("symlinked", dict()), 
+                  merge=("omegaconfig_list_merge", dict()), s=("omegaconfig_slice", dict()))
+
+def _lazy_resolver(name):
+    def resolver(*args, **kwargs):
+        return getattr(importlib.import_module("._omegaconf", __name__), name)(*args, **kwargs)
+    return resolver
+
+def _register_resolvers():
+    try:
+        from omegaconf import OmegaConf
+    except ImportError: # configs are not used without omegaconf
+        return
+    for resolver, (name, kwargs) in _RESOLVERS.items():
+        if not OmegaConf.has_resolver(resolver):
+            OmegaConf.register_new_resolver(resolver, _lazy_resolver(name), **kwargs)
+
+_register_resolvers()
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LAZY.keys()))
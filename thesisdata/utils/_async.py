@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Background writing, overlaps environment stepping with serialization and disk writes (see GymDatasetWriter). 
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import queue
+import threading
+
+__all__ = ("AsyncWriter",)
+
+class AsyncWriter:
+
+    def __init__(self, maxsize=2):
+        """ Runs submitted tasks in order on a background thread. The queue is bounded, submit blocks while it is full (backpressure). 
+            If a task fails no further tasks are run, the error is raised on the submitting thread by the next call to submit or join.
+
+        Args:
+            maxsize (int, optional): maximum number of queued tasks. Defaults to 2.
+        """
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="thesisdata-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                if self._error is None: # drain the queue without running anything after an error
+                    fun, args, kwargs = task
+                    fun(*args, **kwargs)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Background write failed.") from error
+
+    def submit(self, fun, *args, **kwargs):
+        """ Queue fun(*args, **kwargs) to run on the background thread, blocks while the queue is full. """
+        self._raise()
+        if not self._thread.is_alive():
+            raise RuntimeError("Background writer has been closed.")
+        self._queue.put((fun, args, kwargs))
+
+    def wait(self):
+        """ Wait for all queued tasks to finish. """
+        self._queue.join()
+        self._raise()
+
+    def join(self):
+        """ Finish all queued tasks and stop the background thread. """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise()
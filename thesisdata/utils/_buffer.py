@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Columnar episode buffer, image observations are collected into preallocated arrays and converted (see observation_view) once per chunk rather than once per transition.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+
+from ._view import observation_view
+
+__all__ = ("EpisodeBuffer", "CONVERT_CHUNK_SIZE")
+
+CONVERT_CHUNK_SIZE = 64 # transitions, small enough that each converted chunk is a small allocation (e.g. ~26 MB of float32 atari frames)
+
+class EpisodeBuffer:
+
+    def __init__(self, float=False, chw=False, keys=('state', 'nextstate'), chunk_size=CONVERT_CHUNK_SIZE):
+        """ Buffer transitions and convert their observation fields in a single vectorized operation per chunk.
+
+        Args:
+            float (bool, optional): convert integer observations to [0-1] float32. Defaults to False.
+            chw (bool, optional): convert HWC observations to CHW. Defaults to False.
+            keys (tuple, optional): observation fields. Defaults to ('state', 'nextstate').
+            chunk_size (int, optional): maximum number of transitions buffered before they are converted. Defaults to CONVERT_CHUNK_SIZE.
+        """
+        self.float, self.chw = float, chw
+        self.keys = keys
+        self.chunk_size = chunk_size
+        self._arrays = dict() # preallocated on first use, reused for every chunk
+        self._transitions = []
+        self._shared = True # state[t] is nextstate[t-1] (the same object), only one observation sequence is converted
+        self._previous = None
+
+    def __len__(self):
+        return len(self._transitions)
+
+    @property
+    def full(self):
+        return len(self._transitions) >= self.chunk_size
+
+    def append(self, x):
+        """ Add a transition.
+
+        Args:
+            x (dict): transition, observation fields must be numpy arrays.
+        """
+        x = dict(x.items())
+        i = len(self._transitions)
+        for k in self.keys:
+            if k in x:
+                v = np.asarray(x[k])
+                if k not in self._arrays or self._arrays[k].shape[1:] != v.shape or self._arrays[k].dtype != v.dtype:
+                    self._arrays[k] = np.empty((self.chunk_size, *v.shape), dtype=v.dtype)
+                self._arrays[k][i] = v
+        if 'state' in x and 'nextstate' in x:
+            self._shared = self._shared and (i == 0 or x['state'] is self._previous)
+            self._previous = x['nextstate']
+        self._transitions.append(x)
+
+    def flush(self):
+        """ Convert the buffered observations and empty the buffer.
+
+        Returns:
+            List[dict]: transitions, observation fields are views of the converted chunk.
+        """
+        n = len(self._transitions)
+        if n == 0:
+            return []
+        converted = dict()
+        if self._shared and 'state' in self._arrays and 'nextstate' in self._arrays:
+            observation = self._convert(self._arrays['state'][:1], self._arrays['nextstate'][:n])
+            converted['state'], converted['nextstate'] = observation[:-1], observation[1:]
+        for k, v in self._arrays.items():
+            if k not in converted:
+                converted[k] = self._convert(v[:n])
+        transitions, self._transitions = self._transitions, []
+        self._shared = True
+        for i, x in enumerate(transitions):
+            for k, v in converted.items():
+                if k in x:
+                    x[k] = v[i]
+        return transitions
+
+    def _convert(self, *parts):
+        # convert parts (concatenated along the first axis) directly into a new array, without an intermediate copy
+        shape = np.moveaxis(parts[0], -1, -3).shape[1:] if self.chw else parts[0].shape[1:]
+        out = np.empty((sum(len(p) for p in parts), *shape), dtype=np.float32 if self.float else parts[0].dtype)
+        i = 0
+        for p in parts:
+            observation_view(p, float=self.float, chw=self.chw, out=out[i:i + len(p)])
+            i += len(p)
+        return out
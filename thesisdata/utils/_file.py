@@ -12,6 +12,8 @@ import glob
 import os
 import re
 
+from ._shard import load_shard_index
+
 class FileResolver:
 
     def __init__(self, dirs, suffix=['.tar*']):
@@ -34,11 +36,22 @@ class FileResolver:
         for path in self.base:
             if path.is_file():
                 files.append(path)
+            elif len(index := load_shard_index(path)) > 0: # sharded dataset, see ShardWriter
+                files.extend(str(pathlib.PurePath(path, shard)) for shard in sorted(set(index.values())))
             else:
                 for suffix in self.suffix:
                     files.extend(glob.glob(str(pathlib.PurePath(path, f"*{suffix}")), recursive=True))
         return files
 
+    @property
+    def episodes(self):
+        """ Episodes in sharded datasets, maps <DIRECTORY>/<EPISODE> -> shard file (see ShardWriter). """
+        episodes = dict()
+        for path in self.base:
+            if path.is_dir():
+                episodes.update({str(pathlib.PurePath(path, k)):str(pathlib.PurePath(path, v)) for k,v in load_shard_index(path).items()})
+        return episodes
+
 class SymlinkFileResolver(FileResolver):
 
     def __init__(self, base, alias, **kwargs):
@@ -9,7 +9,9 @@ __status__ = "Development"
 
 import pathlib
 import glob
-import stable_baselines3
+import itertools
+import sys
+import time
 import yaml
 import gymu # ensures env seralization works properly.
 import numpy as np
@@ -18,65 +20,346 @@ import gym
 from tqdm.auto import tqdm
 
 from ._logging import getLogger
+from ._utils import resolve_class, mode_keys
+from ._omegaconf import get_environment_config
+from ._shard import ShardWriter
+from ._storage import make_storage, DEFAULT_CHUNK_SIZE
+from ._manifest import Manifest
+from ._index import write_transition_index
+from ._profile import Profiler, file_size, _unwrap
+from ._async import AsyncWriter
+from ._buffer import EpisodeBuffer
+from ._view import observation_view
+from ._utils import commit_files
+from ._vec import VecIterator, VectorEnvWrapper
 Logger = getLogger()
 
 WRITE_MODE_APPEND = 'a'
 WRITE_MODE_WRITE = 'w'
 
-__all__ = ("GymDatasetWriter",)
+__all__ = ("GymDatasetWriter", "make_iterator", "make_environment", "environment_args", "count_episodes")
+
+def make_iterator(args):
+    """ Create the environment, policy and episode iterator described by the command line arguments (see thesisdata.__main__). 
+        Each call creates a fresh environment and policy, this is used by each worker process when generating in parallel.
+
+    Args:
+        args (argparse.Namespace): command line arguments.
+
+    Returns:
+        gymu.iter.Iterator: episode iterator (VecIterator for vec envs).
+    """
+    mode = gymu.mode.mode(args.mode)
+    if "stable_baselines3" in args.policy:
+        from ..environment import sb3
+        env, policy = sb3.load(args)
+        if args.__dict__.get('n_envs', 1) > 1:
+            return VecIterator(env, policy=policy, mode=mode, max_length=args.max_episode_length)
+    else: 
+        env = gymu.make(args.env_id, **args.env_kwargs)
+        policy = resolve_class(args.policy)(env)
+        if isinstance(env.unwrapped, gym.vector.VectorEnv): # e.g. MNISTVector-v0, the policy acts on the whole batch (its action space is batched)
+            return VecIterator(VectorEnvWrapper(env), policy=policy, mode=mode, max_length=args.max_episode_length, batch_dim=False)
+
+    if gymu.intercept.interceptable(env):
+        return gymu.intercept.InterceptIterator(env, policy=policy, mode=mode, max_length=args.max_episode_length)
+    else:
+        return gymu.iter.Iterator(env, policy=policy, mode=mode, max_length=args.max_episode_length)
+
+def make_environment(args):
+    """ Create the environment described by the command line arguments (see make_iterator), without the policy. """
+    if "stable_baselines3" in args.policy:
+        from ..environment import sb3
+        return sb3.load_env(args)
+    return gymu.make(args.env_id, **args.env_kwargs)
+
+def environment_args(args):
+    """ The command line arguments needed to recreate the environment of a dataset (see make_environment), saved to meta.yaml. """
+    keys = ("env_id", "env_kwargs", "policy", "mode", "max_episode_length")
+    return {k:args.__dict__[k] for k in keys if k in args.__dict__}
+
+def count_episodes(path):
+    """ Number of episodes that have already been committed to the dataset directory at path (see Manifest). """
+    return len(Manifest(path))
 
 class GymDatasetWriter:
 
-    def __init__(self, path, iterator, write_mode=WRITE_MODE_APPEND):
+    def __init__(self, path, iterator, write_mode=WRITE_MODE_APPEND, seed=None, shard_size=None, raw_observations=False, storage=None, codec=None, chunk_size=DEFAULT_CHUNK_SIZE, 
+                    min_episode_length=0, max_retries=100, profile=False, write_queue=0, dedup=False, keyframe_interval=0):
+        """ Write episodes from a gymu iterator to a dataset directory, one file per episode or packed into shards (see ShardWriter). If the policy is gymu.policy.Uniform and 
+            the environment has a sample_episode method (e.g. MNISTEnvironment) whole episodes are sampled in one pass rather than stepped.
+
+        Args:
+            path (str, pathlib.Path): dataset directory.
+            iterator (gymu.iter.Iterator): episode iterator.
+            write_mode (str, optional): 'a' to append to an existing directory, 'w' otherwise. Defaults to 'a'.
+            seed (int, optional): base seed, episode i is seeded with seed + i. Defaults to None (unseeded).
+            shard_size (int, str, optional): pack consecutive episodes into shards of this size e.g. '512MB'. Defaults to None (one file per episode).
+            raw_observations (bool, optional): write image observations with their original dtype and layout (e.g. uint8 HWC), the float/CHW conversion is recorded in meta.yaml 
+                as 'observation_view' and applied when reading (see ObservationView). Observations of an environment 
+                with obs_dtype="uint8" (e.g. MNISTEnvironment) are always written raw. Defaults to False.
+            storage (str, optional): storage backend 'gymu' (gymu.data.write_episode), 'columns' (see ColumnStorage) or 'npy' (see NpyStorage). Defaults to None ('columns' if a codec is given, otherwise 'gymu').
+            codec (str, optional): write episodes as chunked columns compressed with this codec ('none', 'zlib', 'lz4' or 'zstd'), see ColumnStorage. Defaults to None.
+            chunk_size (int, optional): number of transitions in each column chunk. Defaults to DEFAULT_CHUNK_SIZE.
+            min_episode_length (int, optional): discard episodes that are shorter than this before anything is written, discarded episodes do not use up episode numbers. Defaults to 0.
+            max_retries (int, optional): maximum number of times an episode is discarded (and regenerated) before giving up. Defaults to 100.
+            profile (bool, optional): time each stage of generation (see Profiler), statistics are written to <PATH>/profile.jsonl and summarised in meta.yaml. Defaults to False.
+            write_queue (int, optional): if > 0 finished episodes are written on a background thread while the next episode is generated, at most this many episodes are queued (held in memory). 
+                Defaults to 0 (write synchronously).
+            dedup (bool, optional): write state and nextstate once as a single observation sequence, for 'columns' and 'npy' storage (and shards). Defaults to False.
+            keyframe_interval (int, optional): write a keyframe every keyframe_interval steps with 'replay' storage (see ReplayReader). Defaults to 0.
+        """
         self.path = pathlib.Path(path)
+        self.min_episode_length = min_episode_length
+        self.max_retries = max_retries
 
         self.iterator = iterator
+        self.policy = _unwrap(iterator.policy) # a reused iterator (see load_plan) may already be timed by a Profiler
         self.num_episodes = 0
+        self.seed = seed # episode i is seeded with seed + i, this makes episodes independent of the order in which they are written.
         exist_ok = write_mode == WRITE_MODE_APPEND
         self.path.mkdir(parents=True, exist_ok=exist_ok)
+        self.manifest = Manifest(self.path)
+        if self.manifest.seed is None:
+            self.manifest.seed = seed
         if write_mode == WRITE_MODE_APPEND:
-            self.num_episodes = len(list(self.path.iterdir()))
+            self.num_episodes = self.manifest.next_episode()
+
+        self._length = 0
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler(pathlib.Path(self.path, "profile.jsonl"))
+            self.profiler.instrument(iterator)
+        self._async = AsyncWriter(write_queue) if write_queue > 0 else None
+        self.storage = make_storage(storage, codec=codec, chunk_size=chunk_size, dedup=dedup and shard_size is None, keyframe_interval=keyframe_interval)
+        if storage == "replay":
+            if hasattr(iterator, "seed"): # e.g. VecIterator, episodes do not start from a seeded reset
+                raise ValueError("Episodes generated with n_envs > 1 (or a vector environment) cannot be replayed, use n_envs=1 (or a single environment) with 'replay' storage.")
+            raw_observations = True # re-simulated observations are raw, the conversion is recorded in meta.yaml
+        self._shards = None
+        if shard_size is not None:
+            if storage not in (None, "columns"):
+                raise ValueError(f"Shards use 'columns' storage, '{storage}' storage cannot be sharded.")
+            self._shards = ShardWriter(self.path, shard_size, tmp=self.manifest.tmp, on_commit=self.manifest.commit, lock=self.manifest.lock, codec=codec or "none", chunk_size=chunk_size, dedup=dedup)
 
         self._write_wrapped = iterator.env
         self._write_wrappers = []
+        self.observation_view = dict() # conversion to apply when reading raw observations, see ObservationView
         
         # this is a bit of hack to get stable baselines in the right save format... for some reason they are working with uint8 HWC format images? why!?
         if isinstance(iterator.env.observation_space, gym.spaces.Box) and len(iterator.env.observation_space.shape) == 3:
             # if the environment has integer image observations (uint8) then wrap it as a float...
             if issubclass(iterator.env.observation_space.dtype.type, np.integer):
-                self._write_wrapped = gymu.wrappers.image.Float(self._write_wrapped) # convert to 0-1 float observations for writing...
-                self._write_wrappers.append(self._write_wrapped)
+                self.observation_view['float'] = True
             # if the enviroment is in HWC format, then wrap it as CHW format
             if iterator.env.observation_space.shape[-1] in [1,3]: # guess channel dimension...
+                self.observation_view['chw'] = True
+        
+        self.chunk_size = chunk_size
+        self._sample_episode = self._get_sample_episode(iterator)
+        self._write_view = dict() # conversion applied at write time, see EpisodeBuffer
+        # an environment that explicitly asks for uint8 output (e.g. MNISTEnvironment(obs_dtype="uint8")) is written as it is, the conversion is recorded in meta.yaml.
+        raw_observations = raw_observations or getattr(iterator.env.unwrapped, "obs_dtype", None) == "uint8"
+        if not raw_observations: # convert at write time, otherwise the conversion is recorded in meta.yaml and done when reading.
+            self._write_view = dict(self.observation_view)
+            if self.observation_view.get('float', False):
+                self._write_wrapped = gymu.wrappers.image.Float(self._write_wrapped) # convert to 0-1 float observations for writing...
+                self._write_wrappers.append(self._write_wrapped)
+            if self.observation_view.get('chw', False):
                 self._write_wrapped = gymu.wrappers.image.CHW(self._write_wrapped) # convert to CHW observations for writing...
                 self._write_wrappers.append(self._write_wrapped)
+            self.observation_view = dict()
+
+    def _get_sample_episode(self, iterator):
+        # whole episodes of a uniform policy are sampled in one pass if the environment supports it (see MNISTEnvironment.sample_episode)
+        sample_episode = getattr(iterator.env.unwrapped, "sample_episode", None)
+        if not callable(sample_episode) or hasattr(iterator, "seed"): # e.g. VecIterator
+            return None
+        if not isinstance(_unwrap(iterator.policy), gymu.policy.Uniform):
+            return None
+        return sample_episode
+
+    def _sample_episode_iter(self):
+        start = time.perf_counter()
+        episode = self._sample_episode(max_length=getattr(self.iterator, "max_length", None))
+        observation = episode['observation']
+        sampled = time.perf_counter()
+        if len(self._write_view) > 0: # a single conversion for the whole episode
+            observation = observation_view(observation, **self._write_view)
+        if self.profiler is not None:
+            self.profiler.times["env"] += sampled - start
+            self.profiler.times["convert"] += time.perf_counter() - sampled
+        keys = mode_keys(self.iterator.mode)
+        self._length = len(episode['action'])
+        for i in range(self._length):
+            x = dict(state=observation[i], action=episode['action'][i], reward=episode['reward'][i], nextstate=observation[i+1], 
+                     done=episode['done'][i], info=dict(label=episode['label'][i+1]))
+            yield self.iterator.mode(**{k:x[k] for k in keys})
+
+    def _flush(self, buffer):
+        if self.profiler is not None:
+            t = time.perf_counter()
+        transitions = buffer.flush()
+        if self.profiler is not None:
+            self.profiler.times["convert"] += time.perf_counter() - t
+        for x in transitions:
+            yield self.iterator.mode(**x)
 
     def _write_wrapper_iter(self):
+        self._length = 0
+        if self._sample_episode is not None:
+            yield from self._sample_episode_iter()
+            return
+        if len(self._write_view) == 0:
+            for x in self.iterator:
+                self._length += 1
+                yield x
+            return
+        # the write wrappers (Float/CHW) are applied to whole chunks of the episode rather than to each observation, see EpisodeBuffer
+        buffer = EpisodeBuffer(**self._write_view)
         for x in self.iterator:
-            x = dict(x.items())
-            for wrapper in self._write_wrappers:
-                assert isinstance(wrapper, gym.ObservationWrapper)
-                if 'state' in x:
-                    x['state'] = wrapper.observation(x['state'])
-                if 'nextstate' in x:
-                    x['nextstate'] = wrapper.observation(x['nextstate'])
-            yield self.iterator.mode(**x)
+            buffer.append(x)
+            self._length += 1
+            if buffer.full:
+                yield from self._flush(buffer)
+        yield from self._flush(buffer)
+
+    def _seed_episode(self, episode, retry=0):
+        if self.seed is None:
+            return None
+        seed = self.seed + episode
+        if retry > 0: # a discarded episode, the retry must not reproduce it.
+            seed = int(np.random.SeedSequence([self.seed, episode, retry]).generate_state(1)[0])
+        np.random.seed(seed) # used by policies for epsilon exploration
+        if "torch" in sys.modules: # used by stochastic sb3 policies, torch is not imported otherwise (e.g. for MNIST)
+            sys.modules["torch"].manual_seed(seed)
+        self.iterator.env.action_space.seed(seed)
+        if hasattr(self.iterator, "seed"): # e.g. VecIterator, episodes are not generated one at a time.
+            self.iterator.seed(seed)
+        else:
+            self.iterator.env.seed(seed)
+        return seed
+
+    def _episode_iter(self, episode):
+        # buffers the first min_episode_length transitions so that short episodes are discarded before anything is written.
+        for retry in range(self.max_retries + 1):
+            seed = self._seed_episode(episode, retry)
+            iterator = self._write_wrapper_iter()
+            if self.profiler is not None:
+                iterator = self.profiler.iterate(iterator)
+            buffer = list(itertools.islice(iterator, self.min_episode_length))
+            if len(buffer) >= self.min_episode_length:
+                return seed, itertools.chain(buffer, iterator)
+            Logger.info(f"Discarding episode of length {len(buffer)} < {self.min_episode_length}")
+        raise RuntimeError(f"Failed to generate an episode of length >= {self.min_episode_length} after {self.max_retries} retries.")
+
+    def write_episode(self, episode):
+        """ Write a single episode with the given episode number. The episode is written to a temporary file and atomically moved into place once it is finished, 
+            it is NOT added to the manifest (see write).
+
+        Args:
+            episode (int): episode number, used as the file name and to seed the episode.
+
+        Returns:
+            dict: the manifest record of the episode (files, length, seed), or None if the episode was added to a shard that has not yet been committed.
+        """
+        name = str(episode).zfill(8)
+        Logger.info(f"Writing episode: {pathlib.Path(self.path, name)}")
+        if self.profiler is not None:
+            self.profiler.start()
+        seed, iterator = self._episode_iter(episode)
+        if self._async is not None: # generate the episode here, write it in the background
+            buffer = list(iterator)
+            snapshot = self.profiler.snapshot() if self.profiler is not None else None
+            self._async.submit(self._store, name, buffer, seed, len(buffer), snapshot=snapshot, commit=True)
+            return None
+        return self._store(name, iterator, seed, None)
+
+    def _store(self, name, iterator, seed, length, snapshot=None, commit=False):
+        start = time.perf_counter()
+        if self._shards is not None:
+            size = self._shards.write(name, iterator, seed=seed)
+            record = None
+        else:
+            self.manifest.tmp.mkdir(parents=True, exist_ok=True)
+            files = self.storage.write(self.manifest.tmp, name, iterator)
+            record = dict(files=commit_files(files, self.path), length=self._length if length is None else length, seed=seed)
+        if self.profiler is not None:
+            size = size if record is None else sum(file_size(pathlib.Path(self.path, f)) for f in record['files'])
+            length = self._length if length is None else length
+            stats = self.profiler.stop(name, length, size, snapshot=snapshot, write_time=None if snapshot is None else time.perf_counter() - start)
+            Logger.debug(f"Episode {name}: {stats['steps_per_sec']:.1f} steps/s, {stats['bytes_per_sec'] / 1e6:.2f} MB/s")
+        if commit and record is not None:
+            self.manifest.commit(name, **record)
+        return record
+
+    def write(self, n, resume=False):
+        """ Write n episodes, each is added to the manifest once it has been committed. 
+
+        Args:
+            n (int): number of episodes to write.
+            resume (bool, optional): resume an unfinished run, unfinished episodes are removed and episodes are written until the dataset contains n episodes. Defaults to False.
+        """
+        if resume:
+            self.manifest.clean()
+            episodes = self.manifest.missing(n)
+            Logger.info(f"Resuming: {len(self.manifest)} episodes already finished, writing {len(episodes)} more.")
+        else:
+            episodes = self.manifest.reserve(n) # other writers may be appending to the same directory
+        for episode in episodes:
+            record = self.write_episode(episode)
+            if record is not None:
+                self.manifest.commit(str(episode).zfill(8), **record)
+            self.num_episodes = max(self.num_episodes, episode + 1)
 
-    def write(self, n):
-        for _ in range(n):
-            path = pathlib.Path(self.path, str(self.num_episodes).zfill(8))
-            Logger.info(f"Writing episode: {path}")
-            gymu.data.write_episode(self._write_wrapper_iter(), path=path)
-            self.num_episodes += 1
+    def close(self):
+        """ Finish writing, waits for background writes, closes the current shard (if episodes are sharded) and writes the transition index (see TransitionIndex). """
+        if self._async is not None:
+            self._async.join()
+        if self._shards is not None:
+            self._shards.close()
+        if self.profiler is not None:
+            summary = self.profiler.write_summary()
+            Logger.info(f"Wrote {summary['episodes']} episodes: {summary['steps_per_sec']:.1f} steps/s, {summary['bytes_per_sec'] / 1e6:.2f} MB/s, " + 
+                        ", ".join(f"{k} {v['fraction']:.1%}" for k,v in summary['stages'].items()))
+        try:
+            write_transition_index(self.path, self.manifest)
+        except ValueError as e: # e.g. episodes written before lengths were recorded
+            Logger.warning(e)
+        self.manifest.release()
 
-    def write_config(self):
+    def write_config(self, environment_args=None, profile=None):
         config = dict(**get_environment_config(self._write_wrapped),
-                        policy = self._get_classname(self.iterator.policy),
+                        policy = self._get_classname(self.policy),
                         mode = self.iterator.mode.__name__)
+        if environment_args is not None: # used to recreate the environment, see ReplayReader
+            config['environment_args'] = dict(environment_args)
+        if self.seed is not None:
+            config['seed'] = self.seed
+        if self.min_episode_length > 0:
+            config['min_episode_length'] = self.min_episode_length
+        if profile is not None: # e.g. summarised over all workers, see write_parallel
+            config['profile'] = profile
+        elif self.profiler is not None:
+            config['profile'] = self.profiler.summary()
+        if self._shards is not None:
+            config['storage'] = dict(format="shards", codec=self._shards.codec.name, chunk_size=self._shards.chunk_size, shard_size=self._shards.shard_size)
+            if self._shards.dedup:
+                config['storage']['dedup'] = True
+        else:
+            config['storage'] = self.storage.config()
+        if len(self.observation_view) > 0:
+            config['observation_view'] = dict(self.observation_view)
+        reference = getattr(self.iterator.env.unwrapped, "observation_reference", None) # observations are references to another dataset, see load_reference
+        if callable(reference) and reference() is not None:
+            config['observation_reference'] = reference()
         # TODO include wrappers... the easiest thing to do might be just to register the environment under thesis/<env_id> elsewhere ???  hmmm...
         
-        with pathlib.Path(self.path, "meta.yaml").open('w') as f:
+        self.manifest.tmp.mkdir(parents=True, exist_ok=True)
+        with pathlib.Path(self.manifest.tmp, "meta.yaml").open('w') as f:
             yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+        commit_files([pathlib.Path(self.manifest.tmp, "meta.yaml")], self.path)
+        self.manifest.release() # e.g. write_config is called after close
 
     def _get_classname(self, obj):
         cls = type(obj)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Global transition index. The index file (index.npz) records the length and the cumulative offset of each episode in a dataset directory, 
+   a global transition index is mapped to (episode, offset) by binary search, without opening any episodes.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import os
+import pathlib
+import numpy as np
+
+from ._manifest import Manifest
+
+__all__ = ("TransitionIndex", "write_transition_index", "TRANSITION_INDEX")
+
+TRANSITION_INDEX = "index.npz"
+
+def write_transition_index(path, manifest=None):
+    """ Write the transition index of the dataset directory at path using the episode lengths recorded in its manifest. The manifest is reloaded and the index 
+        is written while holding the directory lock, so the index includes the episodes of other writers appending to the same directory.
+
+    Args:
+        path (str, pathlib.Path): dataset directory.
+        manifest (Manifest, optional): manifest of the dataset. Defaults to None (load the manifest).
+
+    Returns:
+        TransitionIndex: the index.
+    """
+    path = pathlib.Path(path)
+    manifest = manifest if manifest is not None else Manifest(path)
+    with manifest.lock:
+        manifest.reload()
+        index = TransitionIndex.from_manifest(manifest)
+        tmp = pathlib.Path(manifest.tmp, TRANSITION_INDEX)
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open('wb') as f:
+            np.savez(f, episodes=index.episodes, lengths=index.lengths, offsets=index.offsets)
+        os.replace(tmp, pathlib.Path(path, TRANSITION_INDEX))
+    return index
+
+class TransitionIndex:
+
+    def __init__(self, episodes, lengths, offsets):
+        """ Maps global transition indices to (episode, offset), see TransitionIndex.load. 
+
+        Args:
+            episodes (np.ndarray): episode names.
+            lengths (np.ndarray): episode lengths.
+            offsets (np.ndarray): global index of the first transition in each episode, offsets[-1] is the total number of transitions.
+        """
+        self.episodes = np.asarray(episodes)
+        self.lengths = np.asarray(lengths)
+        self.offsets = np.asarray(offsets)
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        """ Create the index from the episode lengths recorded in a manifest. """
+        episodes = sorted(manifest.episodes.keys())
+        unknown = [e for e in episodes if manifest.episodes[e].get('length', None) is None]
+        if len(unknown) > 0:
+            raise ValueError(f"Cannot create transition index, the lengths of {len(unknown)} episodes (e.g. {unknown[0]}) are unknown.")
+        lengths = np.array([manifest.episodes[e]['length'] for e in episodes], dtype=np.int64)
+        offsets = np.concatenate([np.zeros(1, dtype=np.int64), np.cumsum(lengths)])
+        return cls(np.array(episodes, dtype=str), lengths, offsets)
+
+    @classmethod
+    def load(cls, path):
+        """ Load the transition index of the dataset directory at path. """
+        with np.load(pathlib.Path(path, TRANSITION_INDEX)) as data:
+            return cls(data['episodes'], data['lengths'], data['offsets'])
+
+    def __len__(self):
+        """ Total number of transitions. """
+        return int(self.offsets[-1])
+
+    def lookup(self, i):
+        """ Map global transition index (or indices) to episode index and offset within the episode.
+
+        Args:
+            i (int, np.ndarray): global transition index (or indices), negative indices are supported.
+
+        Returns:
+            Tuple[int, int], Tuple[np.ndarray, np.ndarray]: episode index (see episodes), offset.
+        """
+        i = np.asarray(i)
+        i = np.where(i < 0, i + len(self), i)
+        if np.any(i < 0) or np.any(i >= len(self)):
+            raise IndexError(f"Transition index out of range for {len(self)} transitions.")
+        episode = np.searchsorted(self.offsets, i, side='right') - 1
+        offset = i - self.offsets[episode]
+        if episode.ndim == 0:
+            return int(episode), int(offset)
+        return episode, offset
+
+    def __getitem__(self, i):
+        """ Map global transition index (or indices) to (episode name, offset). """
+        episode, offset = self.lookup(i)
+        return self.episodes[episode], offset
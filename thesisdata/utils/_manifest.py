@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   The manifest (manifest.json) records every episode that has been committed to a dataset directory. Episodes are written to a temporary directory (.tmp) 
+   and atomically renamed into place before being added to the manifest, anything that is not in the manifest is considered unfinished.
+
+   Several writers (processes, or jobs on a shared file system) may append to the same directory. Episode numbers are reserved from a counter in the manifest, 
+   the manifest is only modified while holding the directory lock (.lock).
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import os
+import re
+import json
+import uuid
+import fcntl
+import shutil
+import socket
+import pathlib
+import threading
+
+from ._shard import load_shard_index
+
+__all__ = ("Manifest", "DirectoryLock", "MANIFEST", "TMP_DIRECTORY")
+
+MANIFEST = "manifest.json"
+LOCK = ".lock"
+TMP_DIRECTORY = ".tmp"
+
+_EPISODE_PATTERN = re.compile(r"^([0-9]{8})(\..*)?$")
+
+class DirectoryLock:
+
+    def __init__(self, path):
+        """ Exclusive (re-entrant) lock on a directory shared between processes, uses POSIX record locks on <PATH>/.lock which also work on NFS. 
+
+        Args:
+            path (str, pathlib.Path): directory to lock.
+        """
+        self.path = pathlib.Path(path, LOCK)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o666)
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *args):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._lock.release()
+
+class Manifest:
+
+    def __init__(self, path):
+        """ Manifest of the dataset directory at path. If the directory was written before manifests existed, the manifest is reconstructed from the episode files that are present.
+
+        Args:
+            path (str, pathlib.Path): dataset directory.
+        """
+        self.path = pathlib.Path(path)
+        self.lock = DirectoryLock(self.path)
+        self.seed = None
+        self.episodes = dict() # episode name -> dict(files=[...], length=..., seed=...)
+        self.reserved = 0 # episode numbers below this have been reserved by a writer
+        self._tmp = pathlib.Path(self.path, TMP_DIRECTORY, f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        if self.file.exists():
+            self.reload()
+        elif self.path.exists():
+            self.episodes.update({name:dict(files=[shard]) for name, shard in load_shard_index(self.path).items()})
+            for file in sorted(self.path.iterdir()):
+                match = _EPISODE_PATTERN.match(file.name)
+                if match is not None:
+                    self.episodes.setdefault(match.group(1), dict(files=[]))['files'].append(file.name)
+
+    @property
+    def file(self):
+        return pathlib.Path(self.path, MANIFEST)
+
+    @property
+    def tmp(self):
+        """ Temporary directory that episodes are written to before they are committed, each manifest (writer) has its own. """
+        return self._tmp
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def __contains__(self, name):
+        return name in self.episodes
+
+    def reload(self):
+        """ Reload the manifest, it may have been modified by another writer. The file is always read, file stats (inode, mtime, size) cannot be relied on 
+            to detect changes (os.replace reuses inodes and mtimes may be coarse on shared file systems). 
+        """
+        try:
+            with self.file.open('r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        self.seed = data.get('seed', None) if self.seed is None else self.seed
+        self.episodes = data['episodes']
+        self.reserved = data.get('reserved', 0)
+
+    def clean(self):
+        """ Remove unfinished episodes: everything in the temporary directory and episode files that are not in the manifest (e.g. moved into place just before a crash, 
+            see commit_files). This includes the temporary files of other writers so should not be used while other writers are active. 
+        """
+        with self.lock:
+            self.reload()
+            shutil.rmtree(pathlib.Path(self.path, TMP_DIRECTORY), ignore_errors=True)
+            committed = {file for record in self.episodes.values() for file in record.get('files', [])}
+            for file in sorted(self.path.iterdir()):
+                if _EPISODE_PATTERN.match(file.name) is None or file.name in committed:
+                    continue
+                if file.is_dir():
+                    shutil.rmtree(file)
+                else:
+                    file.unlink()
+
+    def release(self):
+        """ Remove the temporary directory of this manifest (writer) once it has finished, and the shared temporary directory if no other writer is using it. """
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        try:
+            os.rmdir(pathlib.Path(self.path, TMP_DIRECTORY))
+        except OSError: # in use by another writer (or already removed)
+            pass
+
+    def save(self):
+        with self.lock:
+            tmp = self.file.with_name(MANIFEST + ".tmp")
+            with tmp.open('w') as f:
+                json.dump(dict(seed=self.seed, reserved=self.reserved, episodes=self.episodes), f, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.file)
+
+    def commit(self, name, **record):
+        """ Add an episode to the manifest, its files should already be in place (see commit_files).
+
+        Args:
+            name (str): episode name.
+            record: information about the episode e.g. files, length, seed.
+        """
+        with self.lock:
+            self.reload()
+            self.episodes[name] = record
+            self.save()
+
+    def next_episode(self):
+        """ Next unused episode number (following the last committed or reserved episode). """
+        return max(max([int(k) for k in self.episodes.keys()], default=-1) + 1, self.reserved)
+
+    def reserve(self, n):
+        """ Reserve the next n episode numbers, other writers will not use them. 
+
+        Args:
+            n (int): number of episodes to reserve.
+
+        Returns:
+            range: reserved episode numbers.
+        """
+        with self.lock:
+            self.reload()
+            start = self.next_episode()
+            self.reserved = start + n
+            self.save()
+        return range(start, start + n)
+
+    def missing(self, n):
+        """ Episode numbers that are required for the dataset to contain n episodes (lowest unused episode numbers first), used to resume an unfinished run. 
+            Reserved episode numbers that were never committed are considered unused.
+        """
+        with self.lock:
+            self.reload()
+        missing, episode = [], 0
+        while len(missing) + len(self.episodes) < n:
+            if str(episode).zfill(8) not in self.episodes:
+                missing.append(episode)
+            episode += 1
+        return missing
@@ -22,6 +22,7 @@ from ._logging import Logger
 
 def omegaconf_resolver(name, **kwargs): # decorator for registering omegaconf_resolvers
     def _omegaconf_resolver(fun):
+        kwargs.setdefault('replace', True) # replaces the lazy resolver registered by thesisdata.utils
         OmegaConf.register_new_resolver(name, fun, **kwargs)
         return fun
     return _omegaconf_resolver
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Generate episodes in parallel, each worker process creates its own environment and policy (see make_iterator). 
+   Episodes are seeded by their episode number, so the resulting dataset is the same as a sequential run with the same seed.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import pathlib
+import argparse
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ._logging import getLogger
+from ._generate import GymDatasetWriter, make_iterator, environment_args, WRITE_MODE_APPEND
+from ._manifest import Manifest
+from ._index import write_transition_index
+from ._profile import Profiler
+from ._storage import DEFAULT_CHUNK_SIZE
+Logger = getLogger()
+
+__all__ = ("write_parallel",)
+
+_WRITER = None # the writer used by each worker process
+_ARGS = None
+
+def _initialise_worker(args, path, policy_server=None):
+    global _WRITER, _ARGS
+    _ARGS = args
+    if policy_server is not None: # the policy is run by a shared server process, see sb3.server.PolicyServer
+        args = argparse.Namespace(**{**args.__dict__, 'policy_server':policy_server})
+    _WRITER = GymDatasetWriter(path, make_iterator(args), write_mode=WRITE_MODE_APPEND, seed=args.seed, 
+                                raw_observations=args.__dict__.get('raw_observations', False), 
+                                storage=args.__dict__.get('storage', None), 
+                                codec=args.__dict__.get('codec', None), 
+                                chunk_size=args.__dict__.get('chunk_size', DEFAULT_CHUNK_SIZE),
+                                min_episode_length=args.__dict__.get('min_episode_length', 0),
+                                max_retries=args.__dict__.get('max_retries', 100),
+                                profile=args.__dict__.get('profile', False),
+                                dedup=args.__dict__.get('dedup', False),
+                                keyframe_interval=args.__dict__.get('keyframe_interval', 0))
+    multiprocessing.util.Finalize(None, _WRITER.manifest.release, exitpriority=10) # run when the worker process exits
+
+def _write_episode(episode):
+    record = _WRITER.write_episode(episode)
+    return episode, record, _WRITER.profiler.last if _WRITER.profiler is not None else None
+
+def _write_config(profile=None):
+    _WRITER.write_config(environment_args=environment_args(_ARGS), profile=profile)
+
+def write_parallel(args, path, num_episodes, num_workers, write_mode=WRITE_MODE_APPEND, resume=False):
+    """ Write episodes using a pool of worker processes. Workers commit episode files, the manifest is only updated by this (the parent) process.
+
+    Args:
+        args (argparse.Namespace): command line arguments, used by each worker to create its environment and policy.
+        path (pathlib.Path): dataset directory.
+        num_episodes (int): number of episodes to write.
+        num_workers (int): number of worker processes.
+        write_mode (str, optional): 'a' to append to an existing directory, 'w' otherwise. Defaults to 'a'.
+        resume (bool, optional): resume an unfinished run, see GymDatasetWriter.write. Defaults to False.
+    """
+    if args.__dict__.get('shard_size', None) is not None:
+        raise ValueError("Sharded output cannot be written in parallel, shards are written sequentially.")
+    path = pathlib.Path(path)
+    path.mkdir(parents=True, exist_ok=write_mode == WRITE_MODE_APPEND)
+    manifest = Manifest(path)
+    if manifest.seed is None:
+        manifest.seed = args.seed
+    if resume:
+        manifest.clean()
+        episodes = manifest.missing(num_episodes)
+        Logger.info(f"Resuming: {len(manifest)} episodes already finished, writing {len(episodes)} more.")
+    else:
+        episodes = manifest.reserve(num_episodes) # other writers may be appending to the same directory
+    context = multiprocessing.get_context("spawn") # torch does not play nicely with fork
+    server = None
+    if args.__dict__.get('share_policy', False): # a single copy of the policy, observations from all workers are run as one batch
+        if "stable_baselines3" not in args.policy:
+            raise ValueError("Only stable_baselines3 policies can be shared between workers.")
+        from ..environment.sb3.server import PolicyServer
+        server = PolicyServer(args, num_workers, context=context).start()
+    profiler = None
+    if args.__dict__.get('profile', False): # the run summary covers the episodes of every worker
+        profiler = Profiler(pathlib.Path(path, "profile.jsonl"))
+    try:
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=context, initializer=_initialise_worker, 
+                                    initargs=(args, path, server.handle if server is not None else None)) as executor:
+            futures = [executor.submit(_write_episode, episode) for episode in episodes]
+            for future in as_completed(futures):
+                episode, record, stats = future.result()
+                manifest.commit(str(episode).zfill(8), **record)
+                if profiler is not None:
+                    profiler.add(stats)
+                Logger.debug(f"Finished episode: {episode}")
+            summary = profiler.write_summary() if profiler is not None else None
+            executor.submit(_write_config, summary).result() # a single meta.yaml once all episodes are written
+    finally:
+        if server is not None:
+            server.close()
+    try:
+        write_transition_index(path, manifest)
+    except ValueError as e: # e.g. episodes written before lengths were recorded
+        Logger.warning(e)
+    manifest.release()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Generation plans, several datasets (e.g. train/validate/test splits or different policies) are generated by a single process that reuses the environment and policy.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import argparse
+import pathlib
+import json
+import yaml
+
+__all__ = ("load_plan", "plan_args", "SPLITS")
+
+SPLITS = ("train", "validate", "test")
+
+def load_plan(plan):
+    """ Load a generation plan. A plan is either a mapping from split to number of episodes e.g. {"train": 50, "validate": 20, "test": 20}, 
+        or a list of entries that override command line arguments e.g. [{"split": "train", "num_episodes": 50, "policy_eps": 0.1}, {"split": "train", "num_episodes": 50, "policy_eps": 0.5, "path": "{env_id}/eps-0.5"}].
+
+    Args:
+        plan (str, dict, list): plan, a JSON string or the path of a .json/.yaml file.
+
+    Returns:
+        List[dict]: plan entries, in the order they should be generated.
+    """
+    if isinstance(plan, str):
+        file = pathlib.Path(plan).expanduser()
+        if file.suffix in (".json", ".yaml", ".yml") and file.exists():
+            with file.open('r') as f:
+                plan = yaml.safe_load(f) # json is yaml
+        else:
+            plan = json.loads(plan)
+    if isinstance(plan, dict):
+        plan = [dict(split=split, num_episodes=n) for split, n in plan.items()]
+    if not isinstance(plan, list) or not all(isinstance(entry, dict) for entry in plan):
+        raise ValueError(f"Invalid plan: {plan}, expected a mapping from split to number of episodes or a list of entries.")
+    for entry in plan:
+        if entry.get('split', None) not in (None, *SPLITS):
+            raise ValueError(f"Invalid split: {entry['split']}, must be one of {list(SPLITS)}")
+    return plan
+
+def plan_args(args, entry):
+    """ Command line arguments for a plan entry, the entry overrides the given arguments. A 'split' is appended to the path (see --train, --validate, --test). """
+    entry = dict(entry)
+    split = entry.pop('split', None)
+    unknown = [k for k in entry.keys() if k not in args.__dict__]
+    if len(unknown) > 0:
+        raise ValueError(f"Invalid plan entry: {entry}, unknown arguments {unknown}")
+    args = argparse.Namespace(**{**args.__dict__, **entry})
+    if split is not None:
+        args.path = str(pathlib.PurePath(args.path, split))
+    return args
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Low overhead per-stage timing for dataset generation (see GymDatasetWriter). Time is split into the following stages: 
+      env     - environment steps.
+      policy  - policy calls (inference).
+      convert - write time observation conversion (Float/CHW wrappers).
+      other   - the remainder of iterating an episode (iterator overhead, resets, discarded episodes).
+      write   - serialization (storage backend), commit and fsync.
+
+   Statistics are written as JSON lines (one per episode and one for the whole run).
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import json
+import time
+import pathlib
+from collections import defaultdict
+
+__all__ = ("Profiler",)
+
+STAGES = ("env", "policy", "convert", "other", "write")
+
+class _Timed: # times calls to fun, keeps a reference to the original.
+
+    def __init__(self, fun, times, stage):
+        self.__wrapped__ = fun
+        self._times = times
+        self._stage = stage
+
+    def __call__(self, *args, **kwargs):
+        t = time.perf_counter()
+        try:
+            return self.__wrapped__(*args, **kwargs)
+        finally:
+            self._times[self._stage] += time.perf_counter() - t
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+def _unwrap(fun): # an iterator may be reused by several writers (see load_plan), it is only timed by the latest.
+    return fun.__wrapped__ if isinstance(fun, _Timed) else fun
+
+def file_size(path):
+    """ Size of a file, or all files in a directory, in bytes. """
+    path = pathlib.Path(path)
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size
+
+class Profiler:
+
+    def __init__(self, file=None):
+        """ Per-stage timing for dataset generation.
+
+        Args:
+            file (str, pathlib.Path, optional): JSON lines file to append statistics to. Defaults to None (statistics are only logged).
+        """
+        self.file = pathlib.Path(file) if file is not None else None
+        self.times = defaultdict(float) # current episode
+        self.total = defaultdict(float) # whole run
+        self.steps, self.bytes, self.episodes = 0, 0, 0
+        self.last = None # statistics of the last episode
+        self._start = None
+        self._run_start = time.perf_counter()
+
+    def instrument(self, iterator):
+        """ Time the environment steps and policy calls of an episode iterator (gymu.iter.Iterator or VecIterator). """
+        env = getattr(iterator, "venv", iterator.env) # vec iterators step the vec env directly
+        env.step = _Timed(_unwrap(env.step), self.times, "env")
+        iterator.policy = _Timed(_unwrap(iterator.policy), self.times, "policy")
+
+    def iterate(self, iterator, stage="generate"):
+        """ Time spent iterating (generating transitions). """
+        times = self.times
+        iterator = iter(iterator)
+        while True:
+            t = time.perf_counter()
+            try:
+                x = next(iterator)
+            except StopIteration:
+                times[stage] += time.perf_counter() - t
+                return
+            times[stage] += time.perf_counter() - t
+            yield x
+
+    def start(self):
+        self.times.clear()
+        self._start = time.perf_counter()
+
+    def snapshot(self):
+        """ Timings of the current episode so far, used when the episode is written on another thread (see AsyncWriter). """
+        return dict(times=dict(self.times), elapsed=time.perf_counter() - self._start)
+
+    def stop(self, episode, steps, size, snapshot=None, write_time=None):
+        """ Finish timing an episode.
+
+        Args:
+            episode (str): episode name.
+            steps (int): number of transitions.
+            size (int): number of bytes written.
+            snapshot (dict, optional): timings of the episode taken when it finished generating (see snapshot). Defaults to None (the current timings).
+            write_time (float, optional): time taken to write the episode if it was written on another thread. Defaults to None.
+
+        Returns:
+            dict: episode statistics.
+        """
+        if snapshot is None:
+            times, elapsed = self.times, time.perf_counter() - self._start
+        else: # written in the background, overlaps with generating the next episode
+            times, elapsed = snapshot['times'], snapshot['elapsed'] + write_time
+        stages = dict(env=times.get("env", 0.), policy=times.get("policy", 0.), convert=times.get("convert", 0.))
+        stages["other"] = max(times.get("generate", 0.) - sum(stages.values()), 0.)
+        stages["write"] = max(elapsed - times.get("generate", 0.), 0.)
+        record = dict(episode=episode, **self._stats(steps, size, elapsed, stages))
+        self.add(record)
+        self._write(record)
+        self.last = record
+        return record
+
+    def add(self, stats):
+        """ Add the statistics of an episode to the run totals, used to summarise episodes timed by other profilers (e.g. in worker processes, see write_parallel). 
+            Stage times are summed over episodes, with several workers they may add up to more than the elapsed time.
+        """
+        for k, v in stats['stages'].items():
+            self.total[k] += v['time']
+        self.steps, self.bytes, self.episodes = self.steps + stats['steps'], self.bytes + stats['bytes'], self.episodes + 1
+
+    def summary(self):
+        """ Statistics for the whole run. """
+        elapsed = time.perf_counter() - self._run_start
+        return dict(episodes=self.episodes, **self._stats(self.steps, self.bytes, elapsed, {k:self.total[k] for k in STAGES}))
+
+    def write_summary(self):
+        summary = self.summary()
+        self._write(dict(run=summary))
+        return summary
+
+    def _stats(self, steps, size, elapsed, stages):
+        elapsed = max(elapsed, 1e-9)
+        return dict(steps=steps, bytes=size, time=elapsed, 
+                    steps_per_sec=steps / elapsed, 
+                    bytes_per_sec=size / elapsed,
+                    stages={k:dict(time=v, fraction=v / elapsed) for k,v in stages.items()})
+
+    def _write(self, record):
+        if self.file is not None:
+            with self.file.open('a') as f:
+                f.write(json.dumps(record) + "\n")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Zero-copy reader for datasets written with 'npy' storage (see NpyStorage). Each field of each episode is exposed as a memory map, nothing is read until it is used, 
+   so opening a dataset is cheap and several processes reading the same dataset share the page cache.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import pathlib
+import pickle
+import yaml
+import numpy as np
+
+from ._manifest import Manifest
+from ._index import TransitionIndex, TRANSITION_INDEX
+from ._view import ObservationView
+from ._storage import OBSERVATION
+from ._utils import resolve_class
+
+__all__ = ("DatasetReader", "Episode", "load_meta", "load_reference")
+
+class _MetaLoader(yaml.SafeLoader): # meta.yaml contains python objects (e.g. gym spaces) that are not needed for reading
+    pass
+_MetaLoader.add_multi_constructor("", lambda loader, suffix, node: None)
+
+def load_meta(path):
+    """ Load the meta.yaml file of the dataset directory at path, python objects (e.g. gym spaces) are ignored. An empty dict is returned if there is no meta.yaml file. """
+    path = pathlib.Path(path, "meta.yaml")
+    if not path.exists():
+        return dict()
+    with path.open('r') as f:
+        return yaml.load(f, Loader=_MetaLoader) or dict()
+
+def load_reference(meta, **kwargs):
+    """ Create the gather recorded in a dataset's meta data if its observations are references (e.g. indices) into another dataset, 
+        e.g. MNISTEnvironment(observation="index"). The gather is called on a (batched) transition dictionary and returns the transition with observations. 
+        None is returned if the dataset has no observation_reference.
+    """
+    reference = meta.get('observation_reference', None)
+    if reference is None:
+        return None
+    return resolve_class(reference['entry_point']).from_meta(meta, **kwargs)
+
+class Episode:
+
+    def __init__(self, path, mmap_mode='c', convert=None):
+        """ A single episode written with 'npy' storage, fields are memory mapped on first access. Indexing gives the fields as they are stored, see get for converted fields.
+
+        Args:
+            path (str, pathlib.Path): episode directory.
+            mmap_mode (str, optional): numpy memmap mode, 'c' (copy-on-write) gives writable arrays that still share the page cache. Defaults to 'c'.
+            convert (callable, optional): read time conversion of a transition dictionary (see DatasetReader.convert). Defaults to None.
+        """
+        self.path = pathlib.Path(path)
+        self.mmap_mode = mmap_mode
+        self.convert = convert
+        self._fields = dict()
+
+    def keys(self):
+        keys = [f.stem for f in sorted(self.path.iterdir()) if f.suffix in (".npy", ".pyd")]
+        if OBSERVATION in keys and 'state' not in keys: # state and nextstate were written once, see dedup_columns
+            keys.remove(OBSERVATION)
+            keys = sorted(keys + ['nextstate', 'state'])
+        return keys
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            file = pathlib.Path(self.path, f"{key}.npy")
+            observation = pathlib.Path(self.path, f"{OBSERVATION}.npy")
+            if file.exists():
+                self._fields[key] = np.load(file, mmap_mode=self.mmap_mode, allow_pickle=False)
+            elif key in ('state', 'nextstate') and observation.exists(): # state and nextstate were written once, see dedup_columns
+                observation = np.load(observation, mmap_mode=self.mmap_mode, allow_pickle=False)
+                self._fields['state'], self._fields['nextstate'] = observation[:-1], observation[1:] # views, nothing is copied
+            elif (file := file.with_suffix(".pyd")).exists():
+                with file.open('rb') as f:
+                    self._fields[key] = pickle.load(f)
+            else:
+                raise KeyError(key)
+        return self._fields[key]
+
+    def __len__(self):
+        return len(self[next(k for k in self.keys() if k != 'info')])
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def get(self, key, raw=False):
+        """ A whole field with the read time conversion applied (e.g. [0-1] float CHW images for a dataset written with raw uint8 HWC observations).
+
+        Args:
+            key (str): field.
+            raw (bool, optional): the field as it is stored (the same as episode[key]). Defaults to False.
+        """
+        if raw or self.convert is None:
+            return self[key]
+        return self.convert({key:self[key]})[key]
+
+    def tensor(self, key):
+        """ Zero-copy torch view of a field. """
+        import torch
+        return torch.from_numpy(self[key])
+
+    def tensors(self, *keys):
+        """ Zero-copy torch views of the given fields (all array fields by default). """
+        keys = keys if len(keys) > 0 else [k for k in self.keys() if k != 'info']
+        return tuple(self.tensor(k) for k in keys)
+
+class DatasetReader:
+
+    def __init__(self, path, mmap_mode='c'):
+        """ Read a dataset directory written with 'npy' storage (see GymDatasetWriter). Only the manifest (and meta.yaml) are read up front.
+
+        Args:
+            path (str, pathlib.Path): dataset directory.
+            mmap_mode (str, optional): numpy memmap mode, see Episode. Defaults to 'c'.
+        """
+        self.path = pathlib.Path(path).expanduser().resolve()
+        if not self.path.exists():
+            raise ValueError(f"Path {self.path} does not exist.")
+        self.mmap_mode = mmap_mode
+        self.meta = load_meta(self.path)
+        storage = self.meta.get('storage', dict(format="npy"))['format']
+        if storage != "npy":
+            raise ValueError(f"Dataset {self.path} was written with '{storage}' storage, only 'npy' storage can be memory mapped.")
+        self.manifest = Manifest(self.path)
+        self.episodes = sorted(self.manifest.episodes.keys())
+        self.view = ObservationView.from_meta(self.meta) # read time observation conversion for raw observations (if any).
+        self._index = None
+        self._reference = None
+        self._episodes = dict() # opened episodes, their fields stay memory mapped
+
+    @property
+    def index(self):
+        """ Global transition index (see TransitionIndex), it is created from the manifest if the dataset does not have one. """
+        if self._index is None:
+            if pathlib.Path(self.path, TRANSITION_INDEX).exists():
+                self._index = TransitionIndex.load(self.path)
+            else:
+                self._index = TransitionIndex.from_manifest(self.manifest)
+        return self._index
+
+    @property
+    def reference(self):
+        """ Read time gather for observations that are indices into another dataset (see load_reference), None if the observations are stored directly. """
+        if self._reference is None and 'observation_reference' in self.meta:
+            self._reference = load_reference(self.meta)
+        return self._reference
+
+    def convert(self, x):
+        """ Read time conversion of a (batched) transition dictionary, observation references are gathered (see reference) and raw observations are converted (see view). """
+        if self.reference is not None:
+            x = self.reference(x)
+        return self.view(x)
+
+    def transition(self, i, keys=None, raw=False):
+        """ Get a transition by its global index.
+
+        Args:
+            i (int): global transition index.
+            keys (List[str], optional): fields to get. Defaults to None (all array fields).
+            raw (bool, optional): get the fields as they are stored, without the read time conversion (see convert). Defaults to False.
+
+        Returns:
+            dict: transition.
+        """
+        name, offset = self.index[i]
+        episode = self[str(name)]
+        keys = keys if keys is not None else [k for k in episode.keys() if k != 'info']
+        x = {k:episode[k][offset] for k in keys}
+        return x if raw else self.convert(x)
+
+    def transitions(self, indices, keys=None, raw=False):
+        """ Get a batch of transitions by their global indices, the fields of each episode are gathered together and the read time conversion is applied once to the batch.
+
+        Args:
+            indices (np.ndarray): global transition indices.
+            keys (List[str], optional): fields to get. Defaults to None (all array fields).
+            raw (bool, optional): get the fields as they are stored, without the read time conversion (see convert). Defaults to False.
+
+        Returns:
+            dict: batched transitions, in the order of indices.
+        """
+        episodes, offsets = self.index.lookup(np.asarray(indices).reshape(-1))
+        batch = dict()
+        for e in np.unique(episodes):
+            mask = episodes == e
+            episode = self[str(self.index.episodes[e])]
+            keys = keys if keys is not None else [k for k in episode.keys() if k != 'info']
+            for k in keys:
+                value = episode[k][offsets[mask]]
+                if k not in batch:
+                    batch[k] = np.empty((len(episodes), *value.shape[1:]), dtype=value.dtype)
+                batch[k][mask] = value
+        return batch if raw else self.convert(batch)
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def __getitem__(self, i):
+        name = self.episodes[i] if isinstance(i, int) else i
+        if name not in self._episodes:
+            self._episodes[name] = Episode(pathlib.Path(self.path, name), mmap_mode=self.mmap_mode, convert=self.convert)
+        return self._episodes[name]
+
+    def __iter__(self):
+        for name in self.episodes:
+            yield self[name]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Reader for datasets written with 'replay' storage (see ReplayStorage). Only the actions, rewards and dones of each episode are stored, observations are 
+   regenerated by re-simulating each episode from its seed in a fresh environment, optionally in parallel worker processes.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import pathlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from ._logging import getLogger
+from ._manifest import Manifest
+from ._reader import load_meta
+from ._generate import make_environment
+Logger = getLogger()
+
+__all__ = ("ReplayReader",)
+
+_ENV = None # the environment used by each worker process
+
+def _initialise_worker(args):
+    global _ENV
+    _ENV = make_environment(args)
+
+def _replay_worker(file, seed, check):
+    return replay(_ENV, file, seed, check=check)
+
+def replay(env, file, seed, check=True):
+    """ Re-simulate an episode written with 'replay' storage.
+
+    Args:
+        env (gym.Env): environment, created in the same way as when the episode was generated (see make_environment).
+        file (pathlib.Path): episode file (<EPISODE>.replay.npz).
+        seed (int): episode seed (from the manifest).
+        check (bool, optional): check rewards and keyframes against those that were recorded. Defaults to True.
+
+    Raises:
+        RuntimeError: if the re-simulated episode does not match the recorded episode (the environment is not deterministic).
+
+    Returns:
+        dict: episode columns (state, action, reward, nextstate, done, info).
+    """
+    with np.load(str(file)) as data:
+        recorded = {k:data[k] for k in data.files}
+    np.random.seed(seed)
+    env.action_space.seed(seed)
+    env.seed(seed)
+    state = env.reset()
+    if isinstance(state, tuple): # (state, info)
+        state = state[0]
+    states, nextstates, rewards, dones, infos = [], [], [], [], []
+    for action in recorded['action']:
+        nextstate, reward, done, info = env.step(action)
+        states.append(np.asarray(state))
+        nextstates.append(np.asarray(info.get("terminal_observation", nextstate)) if np.all(done) else np.asarray(nextstate)) # vec envs reset automatically
+        rewards.append(reward), dones.append(done), infos.append(info)
+        state = nextstate
+    episode = dict(state=np.stack(states), action=recorded['action'], reward=np.stack(rewards).reshape(recorded['reward'].shape), 
+                    nextstate=np.stack(nextstates), done=np.stack(dones).reshape(recorded['done'].shape), info=infos)
+    if check:
+        if not np.allclose(episode['reward'], recorded['reward']):
+            raise RuntimeError(f"Replay of {file} diverged, rewards do not match.")
+        if 'keyframes' in recorded and not np.array_equal(episode['state'][recorded['keyframe_steps']], recorded['keyframes']):
+            raise RuntimeError(f"Replay of {file} diverged, keyframes do not match.")
+    return episode
+
+class ReplayReader:
+
+    def __init__(self, path, num_workers=0, check=True):
+        """ Read a dataset directory written with 'replay' storage, episodes are re-simulated when they are read.
+
+        Args:
+            path (str, pathlib.Path): dataset directory.
+            num_workers (int, optional): number of worker processes used to re-simulate episodes when iterating. Defaults to 0 (re-simulate in this process).
+            check (bool, optional): check that re-simulated episodes match their recorded rewards and keyframes. Defaults to True.
+        """
+        self.path = pathlib.Path(path).expanduser().resolve()
+        if not self.path.exists():
+            raise ValueError(f"Path {self.path} does not exist.")
+        self.meta = load_meta(self.path)
+        storage = self.meta.get('storage', dict(format=None))['format']
+        if storage != "replay":
+            raise ValueError(f"Dataset {self.path} was written with '{storage}' storage, not 'replay' storage.")
+        if 'environment_args' not in self.meta:
+            raise ValueError(f"Dataset {self.path} does not record the arguments needed to recreate its environment (environment_args in meta.yaml).")
+        self.args = argparse.Namespace(**self.meta['environment_args'], n_envs=1)
+        self.manifest = Manifest(self.path)
+        self.episodes = sorted(self.manifest.episodes.keys())
+        self.num_workers = num_workers
+        self.check = check
+        self._env = None
+
+    def _file(self, name):
+        return pathlib.Path(self.path, self.manifest.episodes[name]['files'][0])
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def __getitem__(self, i):
+        name = self.episodes[i] if isinstance(i, int) else i
+        if self._env is None:
+            self._env = make_environment(self.args)
+        return replay(self._env, self._file(name), self.manifest.episodes[name]['seed'], check=self.check)
+
+    def __iter__(self):
+        if self.num_workers < 1:
+            for name in self.episodes:
+                yield self[name]
+            return
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.num_workers, mp_context=context, initializer=_initialise_worker, initargs=(self.args,)) as executor:
+            files = [self._file(name) for name in self.episodes]
+            seeds = [self.manifest.episodes[name]['seed'] for name in self.episodes]
+            yield from executor.map(_replay_worker, files, seeds, [self.check] * len(files))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Sharded dataset layout. Consecutive episodes are packed into size bounded tar shards (shard-<FIRST_EPISODE>.tar), each episode is stored column-wise 
+   in the same format as ColumnStorage (see _storage.py). The index file shards.yaml records which shard each episode lives in.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import os
+import re
+import contextlib
+import tarfile
+import pathlib
+import yaml
+
+from ._logging import getLogger
+from ._utils import commit_files
+from ._storage import to_columns, encode_columns, add_members, read_columns, get_codec, DEFAULT_CHUNK_SIZE
+Logger = getLogger()
+
+__all__ = ("ShardWriter", "iter_shard", "load_shard_index", "parse_size", "SHARD_INDEX")
+
+SHARD_INDEX = "shards.yaml"
+
+_SIZE_UNITS = dict(B=1, KB=1000, MB=1000**2, GB=1000**3, TB=1000**4, KIB=1024, MIB=1024**2, GIB=1024**3, TIB=1024**4)
+
+def parse_size(size):
+    """ Parse a human readable size e.g. '512MB', '1.5GiB' or '1000' (bytes).
+
+    Args:
+        size (str, int): size to parse.
+
+    Returns:
+        int: size in bytes.
+    """
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([a-zA-Z]*)\s*", size)
+    if match is None or match.group(2).upper() not in _SIZE_UNITS and match.group(2) != "":
+        raise ValueError(f"Invalid size: {size}, expected e.g. '512MB'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper() or "B"])
+
+def load_shard_index(path):
+    """ Load the shard index of the dataset directory at path, an empty index is returned if the dataset is not sharded. 
+
+    Returns:
+        dict: maps episode name -> shard file name.
+    """
+    path = pathlib.Path(path, SHARD_INDEX)
+    if not path.exists():
+        return dict()
+    with path.open('r') as f:
+        return dict(yaml.safe_load(f).get('episodes', None) or {})
+
+def iter_shard(path):
+    """ Iterate over the episodes in a shard. 
+
+    Args:
+        path (str, pathlib.Path): shard file.
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: episode name and its columns (e.g. state, action, ...).
+    """
+    yield from read_columns(path)
+
+class ShardWriter:
+
+    def __init__(self, path, shard_size, tmp=None, on_commit=None, lock=None, codec="none", chunk_size=DEFAULT_CHUNK_SIZE, dedup=False):
+        """ Packs consecutive episodes into tar shards of (at most) shard_size bytes, a single episode that is larger than shard_size is given its own shard. 
+            Shards are written to a temporary directory and moved into place once they are full (or the writer is closed). Shards are named after their 
+            first episode (shard-<EPISODE>.tar), so several writers may write shards to the same directory.
+
+        Args:
+            path (str, pathlib.Path): dataset directory.
+            shard_size (int, str): target shard size, see parse_size.
+            tmp (str, pathlib.Path, optional): temporary directory to write shards to, must be on the same file system as path. Defaults to None (write in place).
+            on_commit (Callable, optional): called as on_commit(name, files=[shard], length=..., **record) for each episode once its shard has been committed. Defaults to None.
+            lock (DirectoryLock, optional): lock held while updating the shard index, required if other writers are writing to the same directory. Defaults to None.
+            codec (str, optional): codec used to compress column chunks, see ColumnStorage. Defaults to "none".
+            chunk_size (int, optional): number of transitions in each column chunk. Defaults to DEFAULT_CHUNK_SIZE.
+            dedup (bool, optional): write state and nextstate once, see dedup_columns. Defaults to False.
+        """
+        self.path = pathlib.Path(path)
+        self.tmp = pathlib.Path(tmp) if tmp is not None else self.path
+        self.shard_size = parse_size(shard_size)
+        self.on_commit = on_commit
+        self.codec = get_codec(codec)
+        self.chunk_size = chunk_size
+        self.dedup = dedup
+        self.lock = lock if lock is not None else contextlib.nullcontext()
+        self.index = load_shard_index(self.path)
+        self._tar = None
+        self._shard = None
+        self._size = 0
+        self._pending = []
+
+    def _open(self, name):
+        self._shard = f"shard-{name}.tar"
+        Logger.info(f"Writing shard: {self._shard}")
+        self.tmp.mkdir(parents=True, exist_ok=True)
+        self._tar = tarfile.open(str(pathlib.Path(self.tmp, self._shard)), 'w')
+        self._size = 0
+    
+    def write(self, name, iterator, **record):
+        """ Write an episode to the current shard.
+
+        Args:
+            name (str): episode name.
+            iterator (Iterable): transitions of the episode (gymu.mode).
+            record: additional information about the episode, passed to on_commit.
+
+        Returns:
+            int: number of bytes written (approx).
+        """
+        columns = to_columns(iterator)
+        members = encode_columns(name, columns, self.codec, self.chunk_size, dedup=self.dedup)
+        size = sum(len(data) + 1024 for _, data in members) # 512 byte header + padding (approx)
+        if self._tar is None or (self._size > 0 and self._size + size > self.shard_size):
+            self.close()
+            self._open(name)
+        add_members(self._tar, members)
+        self._size += size
+        self._pending.append((name, dict(length=len(next(iter(columns.values()), [])), **record)))
+        return size
+
+    def close(self):
+        """ Close and commit the current shard. """
+        if self._tar is None:
+            return
+        self._tar.close()
+        self._tar = None
+        commit_files([pathlib.Path(self.tmp, self._shard)], self.path)
+        with self.lock:
+            self.index = load_shard_index(self.path) # may have been updated by another writer
+            self.index.update({name:self._shard for name, _ in self._pending})
+            self.write_index()
+        for name, record in self._pending:
+            if self.on_commit is not None:
+                self.on_commit(name, files=[self._shard], **record)
+        self._pending.clear()
+
+    def write_index(self):
+        tmp = pathlib.Path(self.tmp, SHARD_INDEX)
+        with tmp.open('w') as f:
+            yaml.dump(dict(shard_size=self.shard_size, episodes=self.index), f, default_flow_style=False, sort_keys=True)
+        os.replace(tmp, pathlib.Path(self.path, SHARD_INDEX))
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Episode storage backends used by GymDatasetWriter.
+
+   'gymu' writes episodes with gymu.data.write_episode (the default). 'columns' writes each episode as a tar file of column chunks, each field (state, action, ...) is split 
+   into chunks of chunk_size transitions that are stored as <EPISODE>.<KEY>.<CHUNK>.npy<CODEC_SUFFIX> members (or <EPISODE>.<KEY>.pyd<CODEC_SUFFIX> for things that are not arrays, e.g. info). 
+   Chunks are compressed individually with one of the codecs below, 'none' leaves them uncompressed. Shards (see ShardWriter) use the same member format.
+   'npy' writes each episode as a directory <EPISODE>/<KEY>.npy (info is stored as <EPISODE>/info.pyd), this layout can be memory mapped (see DatasetReader).
+   'replay' writes only the actions, rewards and dones of each episode (<EPISODE>.replay.npz), and optionally a keyframe every keyframe_interval steps. Observations are 
+   regenerated by re-simulating the episode from its seed (see ReplayReader), this requires a deterministic environment (e.g. atari with repeat_action_probability=0).
+   With dedup=True 'columns' and 'npy' storage write the state and nextstate fields once, as a single observation sequence of length + 1, state and nextstate are views of it when reading.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import io
+import time
+import pickle
+import tarfile
+import pathlib
+import zlib
+import numpy as np
+
+from ._utils import fsync
+
+__all__ = ("EpisodeStorage", "GymuStorage", "ColumnStorage", "NpyStorage", "ReplayStorage", "make_storage", "read_columns", "dedup_columns", "restore_columns", "CODECS", "STORAGE", "DEFAULT_CHUNK_SIZE", "OBSERVATION")
+
+DEFAULT_CHUNK_SIZE = 1024 # transitions
+OBSERVATION = "observation" # state and nextstate stored once, see dedup_columns
+
+class Codec:
+
+    def __init__(self, name, suffix, compress, decompress):
+        self.name, self.suffix = name, suffix
+        self.compress, self.decompress = compress, decompress
+
+def _none():
+    return Codec("none", "", lambda x: x, lambda x: x)
+
+def _zlib():
+    return Codec("zlib", ".zz", lambda x: zlib.compress(x, 1), zlib.decompress)
+
+def _lz4():
+    try:
+        import lz4.frame
+    except ImportError:
+        raise ImportError("The 'lz4' codec requires the lz4 package: pip install lz4")
+    return Codec("lz4", ".lz4", lz4.frame.compress, lz4.frame.decompress)
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("The 'zstd' codec requires the zstandard package: pip install zstandard")
+    compressor, decompressor = zstandard.ZstdCompressor(level=3), zstandard.ZstdDecompressor()
+    return Codec("zstd", ".zst", compressor.compress, decompressor.decompress)
+
+CODECS = dict(none=_none, zlib=_zlib, lz4=_lz4, zstd=_zstd)
+_CODEC_SUFFIX = {"":"none", ".zz":"zlib", ".lz4":"lz4", ".zst":"zstd"}
+
+def get_codec(name):
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec: {name}, must be one of {list(CODECS.keys())}")
+    return CODECS[name]()
+
+def _codec_from_suffix(suffix):
+    if suffix not in _CODEC_SUFFIX:
+        raise ValueError(f"Unknown codec suffix: {suffix}")
+    return get_codec(_CODEC_SUFFIX[suffix])
+
+def to_columns(iterator):
+    """ Collect the transitions of an episode into columns (one list per field). """
+    columns = dict()
+    for x in iterator:
+        for k, v in x.items():
+            columns.setdefault(k, []).append(v)
+    return columns
+
+def stack_column(key, value):
+    """ Stack a column into a single array, the column is returned as a list if this is not possible (e.g. info or ragged observations). """
+    if key == 'info':
+        return list(value)
+    try:
+        value = np.stack([np.asarray(v) for v in value])
+    except ValueError: # ragged... 
+        return list(value)
+    return value if value.dtype != object else list(value)
+
+def dedup_columns(columns):
+    """ Replace the state and nextstate columns of an episode with a single observation column of length + 1 (state = observation[:-1], nextstate = observation[1:]). 
+        Columns are returned unchanged if nextstate[t] != state[t+1] for some t.
+
+    Args:
+        columns (Dict[str, Any]): stacked episode columns, see stack_column.
+
+    Returns:
+        Dict[str, Any]: columns.
+    """
+    state, nextstate = columns.get('state', None), columns.get('nextstate', None)
+    if not (isinstance(state, np.ndarray) and isinstance(nextstate, np.ndarray)):
+        return columns
+    if len(state) == 0 or state.shape != nextstate.shape or state.dtype != nextstate.dtype:
+        return columns
+    if not np.array_equal(state[1:], nextstate[:-1]):
+        return columns
+    columns = {k:v for k,v in columns.items() if k not in ('state', 'nextstate')}
+    columns[OBSERVATION] = np.concatenate([state, nextstate[-1:]])
+    return columns
+
+def restore_columns(columns):
+    """ Inverse of dedup_columns, state and nextstate are views of the observation column (nothing is copied). """
+    if OBSERVATION not in columns or 'state' in columns:
+        return columns
+    columns = dict(columns)
+    observation = columns.pop(OBSERVATION)
+    return dict(state=observation[:-1], nextstate=observation[1:], **columns)
+
+def encode_columns(name, columns, codec, chunk_size=DEFAULT_CHUNK_SIZE, dedup=False):
+    """ Encode the columns of an episode as (member name, bytes) pairs. 
+
+    Args:
+        name (str): episode name.
+        columns (Dict[str, List]): episode columns, see to_columns.
+        codec (Codec): codec used to compress each chunk.
+        chunk_size (int, optional): number of transitions in each chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        dedup (bool, optional): write state and nextstate once, see dedup_columns. Defaults to False.
+
+    Returns:
+        List[Tuple[str, bytes]]: members.
+    """
+    members = []
+    columns = {key:stack_column(key, value) for key, value in columns.items()}
+    if dedup:
+        columns = dedup_columns(columns)
+    for key, value in columns.items():
+        if isinstance(value, np.ndarray):
+            for i, j in enumerate(range(0, max(len(value), 1), chunk_size)):
+                data = io.BytesIO()
+                np.save(data, value[j:j+chunk_size], allow_pickle=False)
+                members.append((f"{name}.{key}.{str(i).zfill(6)}.npy{codec.suffix}", codec.compress(data.getvalue())))
+        else:
+            members.append((f"{name}.{key}.pyd{codec.suffix}", codec.compress(pickle.dumps(list(value)))))
+    return members
+
+def add_members(tar, members):
+    now = time.time()
+    for m, data in members:
+        info = tarfile.TarInfo(m)
+        info.size, info.mtime = len(data), now
+        tar.addfile(info, io.BytesIO(data))
+
+def read_columns(path):
+    """ Read the episodes in a tar file of column chunks (written with ColumnStorage or ShardWriter). 
+
+    Args:
+        path (str, pathlib.Path): file to read.
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: episode name and its columns (e.g. state, action, ...).
+    """
+    name, chunks, objects = None, dict(), dict()
+    def _episode():
+        return restore_columns(dict(**{k:np.concatenate(v) for k,v in chunks.items()}, **objects))
+    with tarfile.open(str(path), 'r') as tar:
+        for member in tar: # episodes and chunks are written contiguously
+            _name, key, *rest = member.name.split(".")
+            if _name != name and name is not None:
+                yield name, _episode()
+                chunks, objects = dict(), dict()
+            name = _name
+            if rest[0].isdigit(): # chunk number
+                rest = rest[1:]
+            codec = _codec_from_suffix("".join("." + r for r in rest[1:]))
+            data = codec.decompress(tar.extractfile(member).read())
+            if rest[0] == "npy":
+                chunks.setdefault(key, []).append(np.load(io.BytesIO(data), allow_pickle=False))
+            else:
+                objects[key] = pickle.loads(data)
+    if name is not None:
+        yield name, _episode()
+
+class EpisodeStorage:
+    """ Writes a single episode to a directory, see GymDatasetWriter. """
+
+    def write(self, path, name, iterator):
+        """ Write an episode.
+
+        Args:
+            path (pathlib.Path): directory to write to.
+            name (str): episode name.
+            iterator (Iterable): transitions of the episode (gymu.mode).
+
+        Returns:
+            List[pathlib.Path]: files that were written.
+        """
+        raise NotImplementedError()
+
+    def config(self):
+        """ Storage configuration, saved to meta.yaml. """
+        raise NotImplementedError()
+
+class GymuStorage(EpisodeStorage):
+    
+    def write(self, path, name, iterator):
+        import gymu
+        gymu.data.write_episode(iterator, path=pathlib.Path(path, name))
+        return [f for f in pathlib.Path(path).iterdir() if f.name == name or f.name.startswith(name + ".")]
+
+    def config(self):
+        return dict(format="gymu")
+
+class ColumnStorage(EpisodeStorage):
+
+    def __init__(self, codec="none", chunk_size=DEFAULT_CHUNK_SIZE, dedup=False):
+        """ Write each episode as a tar file of (compressed) column chunks.
+
+        Args:
+            codec (str, optional): one of CODECS. Defaults to "none".
+            chunk_size (int, optional): number of transitions in each chunk. Defaults to DEFAULT_CHUNK_SIZE.
+            dedup (bool, optional): write state and nextstate once, see dedup_columns. Defaults to False.
+        """
+        self.codec = get_codec(codec)
+        self.chunk_size = chunk_size
+        self.dedup = dedup
+
+    def write(self, path, name, iterator):
+        file = pathlib.Path(path, f"{name}.tar")
+        with tarfile.open(str(file), 'w') as tar:
+            add_members(tar, encode_columns(name, to_columns(iterator), self.codec, self.chunk_size, dedup=self.dedup))
+        return [file]
+
+    def config(self):
+        config = dict(format="columns", codec=self.codec.name, chunk_size=self.chunk_size)
+        if self.dedup:
+            config['dedup'] = True
+        return config
+
+class NpyStorage(EpisodeStorage):
+
+    def __init__(self, dedup=False):
+        """ Write each episode as a directory of uncompressed .npy files (one per field), these can be memory mapped when reading.
+
+        Args:
+            dedup (bool, optional): write state and nextstate once, see dedup_columns. Defaults to False.
+        """
+        self.dedup = dedup
+
+    def write(self, path, name, iterator):
+        directory = pathlib.Path(path, name)
+        directory.mkdir(parents=True, exist_ok=True)
+        columns = {key:stack_column(key, value) for key, value in to_columns(iterator).items()}
+        if self.dedup:
+            columns = dedup_columns(columns)
+        for key, value in columns.items():
+            if isinstance(value, np.ndarray):
+                file = pathlib.Path(directory, f"{key}.npy")
+                np.save(file, value, allow_pickle=False)
+            else:
+                file = pathlib.Path(directory, f"{key}.pyd")
+                with file.open('wb') as f:
+                    pickle.dump(value, f)
+            fsync(file)
+        return [directory]
+
+    def config(self):
+        config = dict(format="npy")
+        if self.dedup:
+            config['dedup'] = True
+        return config
+
+class ReplayStorage(EpisodeStorage):
+
+    def __init__(self, keyframe_interval=0):
+        """ Write the actions, rewards and dones of each episode, observations are regenerated when reading (see ReplayReader). 
+
+        Args:
+            keyframe_interval (int, optional): also write the state every keyframe_interval steps, used to check that re-simulated episodes match. Defaults to 0 (no keyframes).
+        """
+        self.keyframe_interval = keyframe_interval
+
+    def write(self, path, name, iterator):
+        columns = {key:stack_column(key, value) for key, value in to_columns(iterator).items() if key in ('state', 'action', 'reward', 'done')}
+        arrays = {k:v for k,v in columns.items() if k != 'state' and isinstance(v, np.ndarray)}
+        if self.keyframe_interval > 0 and isinstance(columns.get('state', None), np.ndarray):
+            steps = np.arange(0, len(columns['state']), self.keyframe_interval)
+            arrays.update(keyframe_steps=steps, keyframes=columns['state'][steps])
+        file = pathlib.Path(path, f"{name}.replay.npz")
+        with file.open('wb') as f:
+            np.savez_compressed(f, **arrays)
+        fsync(file)
+        return [file]
+
+    def config(self):
+        return dict(format="replay", keyframe_interval=self.keyframe_interval)
+
+STORAGE = dict(gymu=GymuStorage, columns=ColumnStorage, npy=NpyStorage, replay=ReplayStorage)
+
+def make_storage(storage=None, codec=None, chunk_size=DEFAULT_CHUNK_SIZE, dedup=False, keyframe_interval=0):
+    """ Create a storage backend.
+
+    Args:
+        storage (str, optional): one of STORAGE. Defaults to None ('columns' if a codec is given, otherwise 'gymu').
+        codec (str, optional): codec for 'columns' storage. Defaults to None ('none').
+        chunk_size (int, optional): number of transitions in each column chunk for 'columns' storage. Defaults to DEFAULT_CHUNK_SIZE.
+        dedup (bool, optional): write state and nextstate once for 'columns' and 'npy' storage, see dedup_columns. Defaults to False.
+        keyframe_interval (int, optional): write a keyframe every keyframe_interval steps for 'replay' storage. Defaults to 0 (no keyframes).
+    """
+    if storage is None:
+        storage = "gymu" if codec is None else "columns"
+    if storage not in STORAGE:
+        raise ValueError(f"Unknown storage: {storage}, must be one of {list(STORAGE.keys())}")
+    if storage == "columns":
+        return ColumnStorage(codec or "none", chunk_size=chunk_size, dedup=dedup)
+    if codec is not None:
+        raise ValueError(f"A codec cannot be used with '{storage}' storage.")
+    if storage == "npy":
+        return NpyStorage(dedup=dedup)
+    if storage == "replay":
+        return ReplayStorage(keyframe_interval=keyframe_interval)
+    if dedup:
+        raise ValueError(f"State and nextstate cannot be deduplicated with '{storage}' storage, use 'columns' or 'npy' storage.")
+    return STORAGE[storage]()
@@ -7,6 +7,8 @@ __author__ = "Benedict Wilkins"
 __email__ = "benrjw@gmail.com"
 __status__ = "Development"
 
+import os
+import inspect
 import pathlib
 from typing import Union, List, Dict
 
@@ -19,6 +21,37 @@ def resolve_class(cls):
     except (ImportError, AttributeError) as e:
         raise ImportError(cls)
 
+def mode_keys(mode):
+    """ Field names of a gymu mode (e.g. gymu.mode.sard), transitions are created with mode(**{k:x[k] for k in mode_keys(mode)}). """
+    keys = getattr(mode, "_fields", None)
+    if keys is None:
+        keys = inspect.signature(mode).parameters.keys()
+    return tuple(keys)
+
 def get_project_root_directory(root='thesisdata'):
     current_dir = pathlib.Path(__file__)
     return [p for p in current_dir.parents if p.parts[-1]==root][0].parent
+
+def fsync(path):
+    """ Flush the file (or directory) at path to disk. """
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def commit_files(files, path):
+    """ Atomically move (rename) the given files into the directory at path. Files should be on the same file system as path (e.g. in <PATH>/.tmp). 
+
+    Returns:
+        List[str]: committed file names.
+    """
+    names = []
+    for file in files:
+        file = pathlib.Path(file)
+        if file.is_file():
+            fsync(file)
+        os.replace(file, pathlib.Path(path, file.name))
+        names.append(file.name)
+    fsync(path)
+    return names
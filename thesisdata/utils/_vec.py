@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   Episode iterator for vec envs (stable_baselines3 VecEnvs and gym VectorEnvs), the environments are stepped together with a single batched policy call per step.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import collections
+import numpy as np
+import gym
+
+from ._utils import mode_keys
+
+__all__ = ("VecIterator", "VectorEnvWrapper")
+
+class VectorEnvWrapper(gym.Wrapper):
+
+    def __init__(self, env):
+        """ Gives a gym VectorEnv the spaces of one of its environments, these are used to configure the writer (see GymDatasetWriter). The vector env itself is stepped by VecIterator.
+
+        Args:
+            env (gym.vector.VectorEnv): vector environment (possibly wrapped).
+        """
+        super().__init__(env)
+        self.observation_space = env.unwrapped.single_observation_space
+        self.action_space = env.unwrapped.single_action_space
+
+class VecIterator:
+    """
+        Steps each environment of a vec env in lock-step with a single batched policy call per step. Finished trajectories are split back into separate episodes,
+        iterating gives the transitions of the next finished episode (in the same way as gymu.iter.Iterator). With batch_dim each transition keeps the leading batch dimension of 1,
+        so episodes have the same format as those generated by a stable_baselines3 VecEnv with n_envs=1, otherwise transitions have the format of a single (non-vector) environment.
+    """
+
+    def __init__(self, env, policy, mode, max_length=10000, batch_dim=True):
+        self.env = env # sb3.InfoWrapper or VectorEnvWrapper, used for its spaces and config.
+        self.venv = env.env
+        self.policy = policy
+        self.mode = mode
+        self.max_length = max_length
+        self.batch_dim = batch_dim
+        self._keys = mode_keys(mode)
+        self._state = None
+        self._episodes = [[] for _ in range(self.venv.num_envs)]
+        self._truncated = np.zeros(self.venv.num_envs, dtype=bool)
+        self._finished = collections.deque()
+        self._seeded = False
+
+    def seed(self, seed):
+        # the environments are not reset between episodes, so only the first seed is used.
+        if not self._seeded:
+            self.venv.seed(seed)
+            self.venv.action_space.seed(seed) # e.g. batched random policies
+            self._seeded = True
+
+    def discard(self):
+        # discard finished and unfinished episodes, e.g. when the iterator is reused with a different policy (see thesisdata.utils.load_plan).
+        self._finished.clear()
+        for i in range(self.venv.num_envs):
+            self._truncated[i] = self._truncated[i] or len(self._episodes[i]) > 0
+            self._episodes[i] = []
+
+    def _step(self):
+        if self._state is None:
+            self._state = np.array(self.venv.reset())
+        action = np.asarray(self.policy(self._state))
+        nextstate, reward, done, info = self.venv.step(action)
+        reward, done = np.asarray(reward), np.asarray(done)
+        for i in range(self.venv.num_envs):
+            if self._truncated[i]: # wait for the truncated episode to finish, episodes should always start from a reset.
+                self._truncated[i] = not done[i]
+                continue
+            _nextstate = np.array(info[i].get("terminal_observation", nextstate[i]) if done[i] else nextstate[i])
+            j = slice(i, i + 1) if self.batch_dim else i
+            self._episodes[i].append(dict(state=self._state[j].copy(),
+                                          action=action[j].copy(),
+                                          reward=reward[j].copy(),
+                                          nextstate=_nextstate[None] if self.batch_dim else _nextstate,
+                                          done=done[j].copy(),
+                                          info=info[i]))
+            if done[i] or len(self._episodes[i]) >= self.max_length:
+                self._finished.append(self._episodes[i])
+                self._episodes[i] = []
+                self._truncated[i] = not done[i]
+        self._state = np.array(nextstate) # vec envs may reuse their observation buffers...
+
+    def __iter__(self):
+        while len(self._finished) == 0:
+            self._step()
+        for x in self._finished.popleft():
+            yield self.mode(**{k:x[k] for k in self._keys})
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" 
+   Read time observation conversion. Datasets written with raw observations (see GymDatasetWriter) keep the environment's dtype and layout on disk (e.g. uint8 HWC for atari), 
+   the conversion that would have been applied at write time is recorded in meta.yaml as 'observation_view' and applied to whole batches of observations when reading.
+
+   Created on 18-10-2026
+"""
+__author__ = "Benedict Wilkins"
+__email__ = "benrjw@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+
+__all__ = ("observation_view", "ObservationView")
+
+def observation_view(x, float=False, chw=False, out=None):
+    """ Convert a batch of image observations [...,H,W,C] in the same way as gymu.wrappers.image.Float and gymu.wrappers.image.CHW. 
+
+    Args:
+        x (np.ndarray, torch.Tensor): observations.
+        float (bool, optional): convert integer observations to [0-1] float32. Defaults to False.
+        chw (bool, optional): convert HWC observations to CHW. Defaults to False.
+        out (np.ndarray, optional): array to write the converted (numpy) observations to. Defaults to None (a new array).
+
+    Returns:
+        np.ndarray, torch.Tensor: converted observations (the same type as x).
+    """
+    if isinstance(x, np.ndarray):
+        if chw:
+            x = np.moveaxis(x, -1, -3)
+        if out is not None:
+            if float:
+                np.divide(x, np.float32(255), out=out, dtype=np.float32)
+            else:
+                out[...] = x
+            return out
+        if float:
+            x = np.divide(x, np.float32(255), dtype=np.float32) # single pass, no intermediate float copy (and the same values as astype(float32) / 255)
+        return np.ascontiguousarray(x)
+    else: # torch
+        import torch
+        if chw:
+            x = x.movedim(-1, -3)
+        if float:
+            x = x.to(torch.float32).div_(255.)
+        return x.contiguous()
+
+class ObservationView:
+
+    def __init__(self, float=False, chw=False, keys=('state', 'nextstate')):
+        """ Apply observation_view to the observation fields of a (batched) transition dictionary, may be used with dataset.map. 
+
+        Args:
+            float (bool, optional): convert integer observations to [0-1] float32. Defaults to False.
+            chw (bool, optional): convert HWC observations to CHW. Defaults to False.
+            keys (tuple, optional): observation fields. Defaults to ('state', 'nextstate').
+        """
+        self.float = float
+        self.chw = chw
+        self.keys = keys
+
+    @classmethod
+    def from_meta(cls, meta, **kwargs):
+        """ Create the view recorded in a dataset's meta data (see configure_environment), the view does nothing if none was recorded. """
+        view = meta.get('observation_view', None) or dict()
+        return cls(float=view.get('float', False), chw=view.get('chw', False), **kwargs)
+
+    def __call__(self, x):
+        if not (self.float or self.chw):
+            return x
+        x = dict(x.items())
+        for k in self.keys:
+            if k in x:
+                x[k] = observation_view(x[k], float=self.float, chw=self.chw)
+        return x